@@ -30,7 +30,7 @@ class IrysService {
         }
     }
 
-    async uploadData(data, tags = []) {
+    async uploadData(data, tags = [], options = {}) {
         if (!this.uploader) {
             throw new Error("Irys service not initialized");
         }
@@ -44,6 +44,11 @@ class IrysService {
                 ...tags
             ];
 
+            // Compressed (gzip) payloads are tagged so readers can decode them
+            if (options.contentEncoding) {
+                allTags.push({ name: "Content-Encoding", value: options.contentEncoding });
+            }
+
             // Upload to Irys blockchain
             const receipt = await this.uploader.upload(data, { tags: allTags });
             
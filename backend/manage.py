@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Irys Snippet Vault backend
+
+Run from the backend directory so .env is picked up:
+    python manage.py reconcile-counters
+    python manage.py dedupe
+    python manage.py rebuild-trending
+    python manage.py audit-indexes [--apply]
+"""
+
+import argparse
+import asyncio
+import sys
+
+import server
+
+
+async def reconcile_counters(args):
+    """Rebuild denormalized like/comment counters on snippet_metadata."""
+    print("🔧 Reconciling snippet counters...")
+    fixed = await server.reconcile_snippet_counters()
+    print(f"✅ Fixed counters on {fixed} snippets")
+    return 0
+
+
+async def dedupe(args):
+    """Collapse duplicates that block unique indexes, then create the indexes and fix counters."""
+    print("🔧 Removing duplicates under unique keys...")
+    removed = await server.dedupe_unique_keys()
+    for collection, count in removed.items():
+        print(f"🔧 Removed {count} duplicate documents from {collection}")
+
+    failed = await server.ensure_indexes()
+    print(f"🔧 Applied index registry ({failed} failed)")
+
+    fixed = await server.reconcile_snippet_counters()
+    print(f"✅ Removed {sum(removed.values())} duplicates, fixed counters on {fixed} snippets")
+    return 1 if failed else 0
+
+
+async def rebuild_trending(args):
+    """Recompute trending scores from snippets, likes and comments."""
+    print("🔧 Rebuilding trending scores...")
+    updated = await server.rebuild_trending_scores()
+    print(f"✅ Updated trending scores on {updated} snippets")
+    return 0
+
+
+async def redecay_trending(args):
+    """Rebase trending scores onto the current epoch now."""
+    if await server.redecay_trending_scores():
+        print("✅ Re-decayed trending scores")
+    else:
+        print("⚠️ Another process rebased the scores first")
+    return 0
+
+
+async def audit_indexes(args):
+    """Create missing indexes (with --apply) and flag query shapes that scan whole collections."""
+    if args.apply:
+        failed = await server.ensure_indexes()
+        print(f"🔧 Applied index registry ({failed} failed)")
+
+    missing = await server.missing_indexes()
+    for name in missing:
+        print(f"⚠️ Missing index {name}")
+
+    collscans = 0
+    for result in await server.audit_indexes():
+        sort = f" sort={result['sort']}" if result["sort"] else ""
+        stages = " > ".join(result["stages"])
+        if result["collscan"]:
+            collscans += 1
+            print(f"❌ COLLSCAN {result['collection']} {result['query']}{sort}: {stages}")
+        else:
+            print(f"✅ {result['collection']} {result['query']}{sort}: {stages}")
+
+    print(f"\n📊 {collscans} collection scans, {len(missing)} missing indexes")
+    return 1 if collscans or missing else 0
+
+
+COMMANDS = {
+    "reconcile-counters": reconcile_counters,
+    "dedupe": dedupe,
+    "rebuild-trending": rebuild_trending,
+    "redecay-trending": redecay_trending,
+    "audit-indexes": audit_indexes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Irys Snippet Vault maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparsers.add_parser(name, help=command.__doc__)
+    subparsers.choices["audit-indexes"].add_argument(
+        "--apply", action="store_true", help="create missing indexes before auditing"
+    )
+
+    args = parser.parse_args()
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
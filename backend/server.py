@@ -1,9 +1,14 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
+from bson import ObjectId
+from bson.errors import InvalidId
 import os
 import logging
 from pathlib import Path
@@ -14,9 +19,19 @@ from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
 import re
+import gzip
+import base64
 import subprocess
 import json
+import math
+import time
+import mmap
+import threading
+from collections import OrderedDict
 import asyncio
+import aiohttp
+import random
+import hashlib
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -35,6 +50,85 @@ except Exception as e:
     client = None
     db = None
 
+# Irys upload outbox settings
+OUTBOX_WORKERS = int(os.environ.get('IRYS_OUTBOX_WORKERS', '2'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('IRYS_OUTBOX_MAX_ATTEMPTS', '6'))
+OUTBOX_BASE_BACKOFF_SECONDS = float(os.environ.get('IRYS_OUTBOX_BASE_BACKOFF', '2'))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.environ.get('IRYS_OUTBOX_MAX_BACKOFF', '300'))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.environ.get('IRYS_OUTBOX_POLL_INTERVAL', '1'))
+OUTBOX_LEASE_SECONDS = 120  # Longer than the node upload timeout
+
+# Irys gateway read settings
+GATEWAY_CONCURRENCY = int(os.environ.get('IRYS_GATEWAY_CONCURRENCY', '16'))
+GATEWAY_ITEM_TIMEOUT_SECONDS = float(os.environ.get('IRYS_GATEWAY_ITEM_TIMEOUT', '10'))
+QUERY_DEADLINE_SECONDS = float(os.environ.get('IRYS_QUERY_DEADLINE', '15'))
+
+# Gateway failure handling settings
+NEGATIVE_CACHE_BASE_SECONDS = float(os.environ.get('IRYS_NEGATIVE_CACHE_BASE', '60'))
+NEGATIVE_CACHE_MAX_SECONDS = float(os.environ.get('IRYS_NEGATIVE_CACHE_MAX', str(24 * 3600)))
+NEGATIVE_CACHE_MAX_ENTRIES = 10000
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('IRYS_CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.environ.get('IRYS_CIRCUIT_RESET', '30'))
+
+# Local Irys content cache settings
+CONTENT_CACHE_DIR = Path(os.environ.get('IRYS_CACHE_DIR', ROOT_DIR / '.irys_cache'))
+CONTENT_CACHE_MEMORY_BYTES = int(os.environ.get('IRYS_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+CONTENT_CACHE_MMAP_THRESHOLD = int(os.environ.get('IRYS_CACHE_MMAP_THRESHOLD', str(256 * 1024)))
+
+# /api/irys-query paging settings
+QUERY_PAGE_SIZE = 100
+QUERY_MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 50
+
+# Public feed paging settings
+FEED_MAX_PAGE_SIZE = 100
+
+# Home timeline settings
+CELEBRITY_FOLLOWER_THRESHOLD = int(os.environ.get('CELEBRITY_FOLLOWER_THRESHOLD', '10000'))
+FANOUT_BATCH_SIZE = 1000
+TIMELINE_BACKFILL_COUNT = 20  # Recent snippets pushed into a timeline on follow
+CELEBRITY_CACHE_TTL_SECONDS = 60
+
+# Counter write-behind settings
+COUNTER_FLUSH_INTERVAL_SECONDS = float(os.environ.get('COUNTER_FLUSH_INTERVAL', '1'))
+COUNTER_BUFFER_MAX_KEYS = int(os.environ.get('COUNTER_BUFFER_MAX_KEYS', '10000'))
+
+# Follow settings
+FOLLOW_BATCH_MAX = 100
+# Wrap follow edge and counter writes in a transaction (requires a replica set)
+FOLLOW_USE_TRANSACTIONS = os.environ.get('FOLLOW_USE_TRANSACTIONS', 'false').lower() == 'true'
+
+# Trending feed settings
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', '24'))
+TRENDING_DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+TRENDING_POST_WEIGHT = 1.0
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+TRENDING_REDECAY_INTERVAL_SECONDS = float(os.environ.get('TRENDING_REDECAY_INTERVAL', str(24 * 3600)))
+TRENDING_EPOCH_RELOAD_SECONDS = 60
+TRENDING_OVERDUE_RELOAD_SECONDS = 1  # Reload cadence once a re-decay is due
+
+# Comment paging settings
+COMMENTS_PAGE_SIZE = 20
+COMMENTS_MAX_PAGE_SIZE = 100
+
+# Live update (server-sent events) settings
+EVENT_SUBSCRIBER_QUEUE_SIZE = int(os.environ.get('EVENT_SUBSCRIBER_QUEUE_SIZE', '100'))
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get('EVENT_HEARTBEAT_SECONDS', '15'))
+
+# Profile summary cache settings
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get('PROFILE_CACHE_TTL', '60'))
+
+# Public feed hot-page cache settings
+FEED_CACHE_PAGES = int(os.environ.get('FEED_CACHE_PAGES', '2'))
+FEED_CACHE_TTL_SECONDS = float(os.environ.get('FEED_CACHE_TTL', '60'))
+FEED_CACHE_MAX_STALE_SECONDS = float(os.environ.get('FEED_CACHE_MAX_STALE', '30'))
+
+# Irys balance cache settings
+BALANCE_CACHE_TTL_SECONDS = float(os.environ.get('IRYS_BALANCE_TTL', '30'))
+BALANCE_REFRESH_INTERVAL_SECONDS = float(os.environ.get('IRYS_BALANCE_REFRESH_INTERVAL', '15'))
+
 # Create the main app without a prefix
 app = FastAPI(title="Irys Snippet Vault API - Social Features")
 
@@ -97,12 +191,15 @@ class IrysUploadRequest(BaseModel):
     signature: str
     address: str
     tags: List[dict] = []
+    encoding: Optional[str] = None  # gzip or None for plain JSON
 
 class IrysUploadResponse(BaseModel):
     id: str
     gateway_url: str
     timestamp: int
     message: str
+    status: str = "done"  # pending, uploading, done, failed
+    upload_id: Optional[str] = None
 
 # Social Features Models
 class UserProfile(BaseModel):
@@ -125,6 +222,10 @@ class FollowRequest(BaseModel):
     follower_address: str
     following_address: str
 
+class FollowBatchRequest(BaseModel):
+    follower_address: str
+    following_addresses: List[str]
+
 class LikeRequest(BaseModel):
     user_address: str
     snippet_id: str
@@ -174,6 +275,9 @@ class SnippetMetadata(BaseModel):
     mood: Optional[str] = None  # For creative content
     theme: Optional[str] = None  # For creative content
     is_public: bool = True
+    likes_count: int = 0  # Maintained by like_snippet / add_comment
+    comments_count: int = 0
+    trending_score: float = 0.0
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class SnippetMetadataCreate(BaseModel):
@@ -189,29 +293,67 @@ class SnippetMetadataCreate(BaseModel):
     theme: Optional[str] = None
     is_public: bool = True
 
+# Irys sidecar warm-up state, reported by /api/ready
+# state: starting, ready, mock (node unavailable), failed
+irys_status = {"state": "starting", "error": None, "checked_at": None}
+irys_warmup_task = None
+
 # Initialize Irys service
 async def init_irys_service():
     """Initialize the Node.js Irys service"""
+    import shutil
+    if shutil.which('node') is None:
+        irys_status.update(state="mock", error="Node.js not available", checked_at=datetime.utcnow())
+        print("⚠️  Node.js not available, Irys uploads will use mock responses")
+        return False
+    
     try:
-        result = subprocess.run(
-            ['node', 'irys_service.js'],
+        process = await asyncio.create_subprocess_exec(
+            'node', 'irys_service.js',
             cwd=ROOT_DIR,
-            capture_output=True,
-            text=True,
-            timeout=30
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
         )
-        if result.returncode == 0:
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise Exception("timed out after 30s")
+        
+        # The script exits 0 even when initialization fails, so check what it reported
+        if process.returncode == 0 and "ready for blockchain operations" in stdout.decode():
+            irys_status.update(state="ready", error=None, checked_at=datetime.utcnow())
             print("✅ Irys service initialized successfully")
             return True
         else:
-            print(f"❌ Irys service initialization failed: {result.stderr}")
+            error = stderr.decode().strip() or stdout.decode().strip()
+            irys_status.update(state="failed", error=error, checked_at=datetime.utcnow())
+            print(f"❌ Irys service initialization failed: {error}")
             return False
     except Exception as e:
+        irys_status.update(state="failed", error=str(e), checked_at=datetime.utcnow())
         print(f"❌ Error initializing Irys service: {e}")
         return False
 
+def ensure_irys_warmup():
+    """Start the Irys warm-up in the background unless it already ran or is running."""
+    global irys_warmup_task
+    if irys_warmup_task is None:
+        irys_warmup_task = asyncio.create_task(warm_up_irys())
+    return irys_warmup_task
+
+async def warm_up_irys():
+    """Warm up the Irys sidecar without holding up request serving."""
+    irys_ready = await init_irys_service()
+    if irys_ready:
+        print("✅ Irys blockchain integration ready!")
+    else:
+        print("⚠️ Irys service initialization failed - some features may not work")
+
 async def call_irys_service(action, data=None):
     """Call the Node.js Irys service with fallback for Vercel deployment"""
+    data = data or {}
     try:
         # Check if we're in a Node.js environment (local development)
         import shutil
@@ -220,7 +362,6 @@ async def call_irys_service(action, data=None):
             print("⚠️  Node.js not available, using mock Irys response for Vercel")
             if action == 'upload':
                 # Generate a mock transaction ID for demo purposes
-                import hashlib
                 content_hash = hashlib.sha256(str(data.get('content', '')).encode()).hexdigest()[:32]
                 return {
                     "id": f"mock_{content_hash}",
@@ -240,9 +381,12 @@ async function main() {{
     try {{
         let result;
         if ('{action}' === 'upload') {{
-            const data = {json.dumps(data.get('content', ''))};
+            const encoding = {json.dumps(data.get('encoding'))};
+            const payload = {json.dumps(data.get('content', ''))};
+            // Compressed payloads arrive base64 encoded
+            const data = encoding ? Buffer.from(payload, 'base64') : payload;
             const tags = {json.dumps(data.get('tags', []))};
-            result = await irysService.uploadData(data, tags);
+            result = await irysService.uploadData(data, tags, {{ contentEncoding: encoding }});
         }} else if ('{action}' === 'balance') {{
             result = await irysService.getBalance();
         }}
@@ -257,23 +401,26 @@ async function main() {{
 main();
 """
         
-        # Write temporary script
-        script_path = ROOT_DIR / 'temp_irys_call.js'
+        # Write temporary script (unique per call so concurrent outbox workers don't collide)
+        script_name = f"temp_irys_call_{uuid.uuid4().hex}.js"
+        script_path = ROOT_DIR / script_name
         with open(script_path, 'w') as f:
             f.write(script)
         
-        # Execute script
-        result = subprocess.run(
-            ['node', 'temp_irys_call.js'],
-            cwd=ROOT_DIR,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        
-        # Cleanup
-        if script_path.exists():
-            script_path.unlink()
+        # Execute script off the event loop
+        try:
+            result = await asyncio.to_thread(
+                subprocess.run,
+                ['node', script_name],
+                cwd=ROOT_DIR,
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+        finally:
+            # Cleanup
+            if script_path.exists():
+                script_path.unlink()
         
         if result.returncode == 0:
             # Parse the JSON output from the last line
@@ -284,19 +431,891 @@ main();
             raise Exception(f"Irys service error: {result.stderr}")
             
     except Exception as e:
+        # Upload failures are retried by the outbox workers, so never mint a fallback id here
         print(f"❌ Error calling Irys service: {e}")
-        # Fallback for any errors - return mock response
-        if action == 'upload':
-            import hashlib
-            content_hash = hashlib.sha256(str(data.get('content', '')).encode()).hexdigest()[:32]
-            return {
-                "id": f"fallback_{content_hash}",
-                "timestamp": int(datetime.utcnow().timestamp() * 1000),
-                "size": len(str(data.get('content', ''))),
-                "gateway_url": f"https://gateway.irys.xyz/fallback_{content_hash}"
-            }
         raise HTTPException(status_code=500, detail=f"Irys service error: {str(e)}")
 
+# Irys balance cache
+# getLoadedBalance spawns node and hits the RPC, so the balance is cached for a
+# short TTL and kept warm by a background refresher.
+balance_cache = {"value": None, "fetched_at": None, "error": None}
+balance_lock = asyncio.Lock()
+balance_refresher_task = None
+
+async def refresh_irys_balance():
+    """Fetch the balance from the sidecar; on failure keep the last known value."""
+    async with balance_lock:
+        try:
+            balance_cache["value"] = await call_irys_service('balance')
+            balance_cache["fetched_at"] = datetime.utcnow()
+            balance_cache["error"] = None
+        except Exception as e:
+            balance_cache["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+    return balance_cache
+
+def balance_age_seconds() -> Optional[float]:
+    if balance_cache["fetched_at"] is None:
+        return None
+    return (datetime.utcnow() - balance_cache["fetched_at"]).total_seconds()
+
+async def get_cached_balance():
+    """Return the cached balance, fetching only when it is missing or expired."""
+    age = balance_age_seconds()
+    if age is not None and age <= BALANCE_CACHE_TTL_SECONDS:
+        return balance_cache
+    # The refresher replaces stale values shortly; serve what we have meanwhile
+    if balance_cache["value"] is not None and balance_refresher_task and not balance_refresher_task.done():
+        return balance_cache
+    
+    if balance_lock.locked():
+        # Another request is already fetching; wait for it instead of spawning node again
+        async with balance_lock:
+            return balance_cache
+    return await refresh_irys_balance()
+
+async def balance_refresher():
+    """Keep the balance cache warm in the background."""
+    await ensure_irys_warmup()
+    while True:
+        await refresh_irys_balance()
+        if balance_cache["error"]:
+            print(f"⚠️ Irys balance refresh failed: {balance_cache['error']}")
+        await asyncio.sleep(BALANCE_REFRESH_INTERVAL_SECONDS)
+
+def gateway_url_for(network: str, irys_id: str) -> str:
+    """Build the gateway URL for a transaction on the given network."""
+    if network == 'devnet':
+        return f"https://devnet.irys.xyz/{irys_id}"
+    return f"https://gateway.irys.xyz/{irys_id}"
+
+# irys_uploads read model
+# Display fields are copied out of the snippet JSON at upload time so /api/irys-query
+# can answer from Mongo alone; the gateway is only needed to verify or backfill.
+def snippet_display_fields(data: dict) -> dict:
+    """Extract the fields the vault UI shows from an uploaded snippet payload."""
+    return {
+        "url": data.get('url', ''),
+        "title": data.get('title', 'Untitled'),
+        "summary": data.get('summary', ''),
+        "tags": data.get('tags', []),
+        "content_type": data.get('content_type') or data.get('contentType', 'web_snippet'),
+        "mood": data.get('mood'),
+        "theme": data.get('theme')
+    }
+
+def snippet_from_upload(upload: dict) -> dict:
+    """Shape an irys_uploads read-model document for /api/irys-query."""
+    return {
+        "id": upload['irys_id'],
+        "irys_id": upload['irys_id'],
+        "url": upload.get('url', ''),
+        "title": upload.get('title', 'Untitled'),
+        "summary": upload.get('summary', ''),
+        "tags": upload.get('tags', []),
+        "content_type": upload.get('content_type', 'web_snippet'),
+        "mood": upload.get('mood'),
+        "theme": upload.get('theme'),
+        "timestamp": upload['timestamp'],
+        "gateway_url": upload.get('gateway_url', ''),  # Empty until the upload completes
+        "network": "irys",
+        "status": upload.get('status', 'done')
+    }
+
+# Index registry
+# Every index the API's queries rely on, applied idempotently at startup
+# (create_index is a no-op when an identical index already exists). Unique
+# indexes enforce one profile per wallet, one like per user and snippet, one
+# follow edge per pair and one timeline entry per owner and snippet.
+INDEX_REGISTRY = {
+    "user_profiles": [
+        ([("wallet_address", 1)], {"unique": True}),
+        ([("snippets_count", -1), ("followers_count", -1)], {}),
+    ],
+    "snippet_metadata": [
+        ([("irys_id", 1)], {}),
+        ([("is_public", 1), ("timestamp", -1), ("_id", -1)], {}),
+        ([("is_public", 1), ("trending_score", -1)], {}),
+        ([("wallet_address", 1), ("timestamp", -1), ("_id", -1)], {}),
+    ],
+    "snippet_likes": [
+        ([("user_address", 1), ("snippet_id", 1)], {"unique": True}),
+        ([("snippet_id", 1)], {}),
+    ],
+    "snippet_comments": [
+        ([("snippet_id", 1), ("created_at", -1), ("_id", -1)], {}),
+    ],
+    "user_follows": [
+        ([("follower_address", 1), ("following_address", 1)], {"unique": True}),
+        ([("following_address", 1)], {}),
+    ],
+    "home_timelines": [
+        ([("owner_address", 1), ("timestamp", -1), ("_id", -1)], {}),
+        ([("owner_address", 1), ("snippet_id", 1)], {"unique": True}),
+        ([("owner_address", 1), ("author_address", 1)], {}),
+        ([("snippet_id", 1)], {}),
+    ],
+    "irys_uploads": [
+        ([("wallet_address", 1), ("timestamp", -1), ("_id", -1)], {}),
+        ([("irys_id", 1)], {}),
+    ],
+    "irys_upload_outbox": [
+        ([("id", 1)], {"unique": True}),
+        ([("status", 1), ("next_attempt_at", 1)], {}),
+        ([("wallet_address", 1), ("content_hash", 1), ("network", 1)], {}),
+    ],
+    "irys_content_index": [
+        ([("wallet_address", 1), ("content_hash", 1), ("network", 1)], {"unique": True}),
+    ],
+}
+
+# Indexes replaced by a registry entry; dropped by ensure_indexes when present
+OBSOLETE_INDEXES = {
+    "irys_upload_outbox": ["content_hash_1_network_1"],
+    "irys_content_index": ["content_hash_1_network_1"],
+}
+
+# Representative query shapes for `manage.py audit-indexes`: (collection, filter, sort)
+INDEX_AUDIT_QUERIES = [
+    ("user_profiles", {"wallet_address": "0x0"}, None),
+    ("user_profiles", {}, [("snippets_count", -1), ("followers_count", -1)]),
+    ("snippet_metadata", {"irys_id": "x"}, None),
+    ("snippet_metadata", {"is_public": True}, [("timestamp", -1), ("_id", -1)]),
+    ("snippet_metadata", {"is_public": True}, [("trending_score", -1)]),
+    ("snippet_metadata", {"wallet_address": {"$in": ["0x0"]}, "is_public": True}, [("timestamp", -1), ("_id", -1)]),
+    ("snippet_likes", {"user_address": "0x0", "snippet_id": "x"}, None),
+    ("snippet_likes", {"user_address": "0x0", "snippet_id": {"$in": ["x"]}}, None),
+    ("snippet_likes", {"snippet_id": "x"}, None),
+    ("snippet_comments", {"snippet_id": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("user_follows", {"follower_address": "0x0", "following_address": "0x1"}, None),
+    ("user_follows", {"following_address": "0x0"}, None),
+    ("home_timelines", {"owner_address": "0x0"}, [("timestamp", -1), ("_id", -1)]),
+    ("home_timelines", {"owner_address": "0x0", "author_address": "0x1"}, None),
+    ("irys_uploads", {"wallet_address": "0x0"}, [("timestamp", -1), ("_id", -1)]),
+    ("irys_upload_outbox", {"id": "pending_x"}, None),
+    ("irys_upload_outbox", {"status": "pending", "next_attempt_at": {"$lte": datetime(2000, 1, 1)}}, None),
+    ("irys_upload_outbox", {"wallet_address": "0x0", "content_hash": "x", "network": "devnet"}, None),
+    ("irys_content_index", {"wallet_address": "0x0", "content_hash": "x", "network": "devnet"}, None),
+]
+
+def index_name(keys: list) -> str:
+    """The name MongoDB gives an index with these keys by default."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+index_bootstrap_task = None
+
+async def ensure_indexes() -> int:
+    """Create every registered index; returns how many could not be created.
+    
+    Each index is applied on its own so one failure (typically a unique index over
+    existing duplicates) does not stop the rest. An unreachable server aborts the
+    whole run instead of waiting out the selection timeout once per index.
+    """
+    failed = 0
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                print(f"🔧 Dropped obsolete index {collection}.{name}")
+    
+    for collection, indexes in INDEX_REGISTRY.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except ConnectionFailure:
+                raise
+            except Exception as e:
+                failed += 1
+                print(f"⚠️ Could not create index {collection}.{index_name(keys)}: {e}")
+                if getattr(e, "code", None) == 11000:
+                    print("⚠️ Existing duplicates block this unique index; run `python manage.py dedupe`")
+    return failed
+
+async def bootstrap_indexes():
+    """Apply the index registry in the background so startup never waits on Mongo."""
+    try:
+        failed = await ensure_indexes()
+        if not failed:
+            print("✅ Indexes are in place")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"⚠️ Could not create indexes: {e}")
+
+def plan_stages(plan) -> List[str]:
+    """All stage names in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+async def audit_indexes() -> List[dict]:
+    """Explain each registered query shape and report which ones scan the collection."""
+    report = []
+    for collection, query, sort in INDEX_AUDIT_QUERIES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "collection": collection,
+            "query": query,
+            "sort": sort,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages
+        })
+    return report
+
+async def missing_indexes() -> List[str]:
+    """Registered indexes that do not exist in the database."""
+    missing = []
+    for collection, indexes in INDEX_REGISTRY.items():
+        existing = await db[collection].index_information()
+        existing_keys = {
+            tuple((field, int(direction)) for field, direction in info["key"])
+            for info in existing.values()
+        }
+        for keys, _ in indexes:
+            if tuple(keys) not in existing_keys:
+                missing.append(f"{collection}.{index_name(keys)}")
+    return missing
+
+# Counter write-behind
+class CounterBuffer:
+    """Coalesces $inc updates per document and flushes them in periodic bulk writes.
+    
+    A viral snippet's likes become one update per flush interval instead of one per
+    click. At most COUNTER_FLUSH_INTERVAL seconds of increments (and never more than
+    COUNTER_BUFFER_MAX_KEYS documents) are held in memory; shutdown flushes the rest.
+    When the flusher is not running (serverless, scripts) increments are written through.
+    """
+    
+    def __init__(self, flush_interval: float, max_keys: int):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.pending = {}  # (collection, key field, key) -> {"inc": {...}, "upsert": bool}
+        self.task = None
+    
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+    
+    def add(self, collection: str, key_field: str, key, increments: dict, upsert: bool = False):
+        entry = self.pending.setdefault((collection, key_field, key), {"inc": {}, "upsert": False})
+        for field, delta in increments.items():
+            entry["inc"][field] = entry["inc"].get(field, 0) + delta
+        entry["upsert"] = entry["upsert"] or upsert
+    
+    async def increment(self, collection: str, key_field: str, key, increments: dict, upsert: bool = False):
+        """Buffer an $inc on the document where key_field == key."""
+        if not self.running:
+            await db[collection].update_one({key_field: key}, {"$inc": increments}, upsert=upsert)
+            return
+        self.add(collection, key_field, key, increments, upsert)
+        if len(self.pending) >= self.max_keys:
+            await self.flush()
+    
+    def rescale(self, collection: str, field: str, factor: float):
+        """Multiply one buffered increment field on every key, e.g. after an epoch change."""
+        for (entry_collection, _, _), entry in self.pending.items():
+            if entry_collection == collection and field in entry["inc"]:
+                entry["inc"][field] *= factor
+    
+    def pending_delta(self, collection: str, key_field: str, key, field: str):
+        """Increment not yet written for one field, to add to a value read from Mongo."""
+        entry = self.pending.get((collection, key_field, key))
+        return entry["inc"].get(field, 0) if entry else 0
+    
+    async def flush(self):
+        """Write everything buffered so far, one bulk_write per collection."""
+        batch, self.pending = self.pending, {}
+        by_collection = {}
+        for (collection, key_field, key), entry in batch.items():
+            by_collection.setdefault(collection, []).append((key_field, key, entry))
+        
+        for collection, entries in by_collection.items():
+            operations = [
+                UpdateOne({key_field: key}, {"$inc": entry["inc"]}, upsert=entry["upsert"])
+                for key_field, key, entry in entries
+            ]
+            try:
+                await db[collection].bulk_write(operations, ordered=False)
+                failed = []
+            except BulkWriteError as e:
+                failed = [entries[error["index"]] for error in e.details.get("writeErrors", [])]
+            except Exception as e:
+                print(f"⚠️ Counter flush to {collection} failed, retrying next interval: {e}")
+                failed = entries
+            
+            # Keep what did not land for the next flush
+            for key_field, key, entry in failed:
+                self.add(collection, key_field, key, entry["inc"], entry["upsert"])
+            if collection == "snippet_metadata":
+                feed_cache.invalidate()  # Cached pages carry the counters
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    def start(self):
+        if not self.running:
+            self.task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+counter_buffer = CounterBuffer(COUNTER_FLUSH_INTERVAL_SECONDS, COUNTER_BUFFER_MAX_KEYS)
+
+# Content-addressed upload index
+# Byte-identical payloads a wallet uploads on the same network map to a single Irys
+# transaction, so re-saving the same snippet JSON reuses the existing upload instead
+# of paying again. Dedup never crosses wallets: the transaction carries the
+# uploader's user and signature tags and is listed under that wallet only.
+def content_hash_for(content: str) -> str:
+    """SHA-256 of the exact payload bytes."""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+async def find_existing_upload(address: str, content_hash: str, network: str):
+    """Return this wallet's stored transaction (or in-flight outbox entry) for identical content."""
+    existing = await db.irys_content_index.find_one(
+        {"wallet_address": address, "content_hash": content_hash, "network": network}
+    )
+    if existing:
+        return existing
+    return await db.irys_upload_outbox.find_one({
+        "wallet_address": address,
+        "content_hash": content_hash,
+        "network": network,
+        "status": {"$in": ["pending", "uploading"]}
+    })
+
+async def record_content_hash(address: str, content_hash: str, network: str, irys_id: str,
+                              gateway_url: str, size: int):
+    """Remember which transaction holds this wallet's content; the first writer wins."""
+    if irys_id.startswith(SYNTHETIC_ID_PREFIXES):
+        return  # Mock uploads must not shadow a real upload once node is available
+    try:
+        await db.irys_content_index.update_one(
+            {"wallet_address": address, "content_hash": content_hash, "network": network},
+            {"$setOnInsert": {
+                "wallet_address": address,
+                "content_hash": content_hash,
+                "network": network,
+                "irys_id": irys_id,
+                "gateway_url": gateway_url,
+                "size": size,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent upload of the same content recorded it first
+        pass
+
+# Irys upload outbox
+# /api/irys-upload records the payload here and returns a provisional id at once.
+# Background workers claim due entries, upload them with exponential backoff and
+# swap the provisional id for the real transaction id once the upload lands.
+outbox_workers = []
+outbox_wakeup = asyncio.Event()
+
+async def enqueue_irys_upload(address: str, content: str, tags: list, network: str, content_hash: str,
+                              display: dict, encoding: Optional[str] = None) -> dict:
+    """Record an upload in the outbox and its provisional entry in irys_uploads."""
+    now = datetime.utcnow()
+    upload_id = f"pending_{uuid.uuid4().hex}"
+    entry = {
+        "id": upload_id,
+        "wallet_address": address,
+        "network": network,
+        "content": content,
+        "content_hash": content_hash,
+        "encoding": encoding,
+        "tags": tags,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "lease_expires_at": None,
+        "irys_id": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    await db.irys_upload_outbox.insert_one(entry)
+    await db.irys_uploads.insert_one({
+        "wallet_address": address,
+        "irys_id": upload_id,
+        "upload_id": upload_id,
+        "gateway_url": "",
+        "timestamp": now,
+        "network": network,
+        "size": len(content),
+        "status": "pending",
+        **display
+    })
+    outbox_wakeup.set()
+    return entry
+
+async def claim_outbox_entry(upload_id: Optional[str] = None):
+    """Atomically claim the next due outbox entry (or a specific one) for uploading."""
+    now = datetime.utcnow()
+    query = {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now}},
+        # Entries whose worker died mid-upload become claimable again once the lease expires
+        {"status": "uploading", "lease_expires_at": {"$lte": now}}
+    ]}
+    if upload_id:
+        query["id"] = upload_id
+    return await db.irys_upload_outbox.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "uploading",
+                "lease_expires_at": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+async def complete_outbox_entry(entry: dict, result: dict):
+    """Mark an outbox entry done and replace its provisional id everywhere it was used."""
+    upload_id = entry["id"]
+    irys_id = result['id']
+    gateway_url = gateway_url_for(entry["network"], irys_id)
+    now = datetime.utcnow()
+    
+    await db.irys_upload_outbox.update_one(
+        {"id": upload_id},
+        {"$set": {
+            "status": "done",
+            "irys_id": irys_id,
+            "gateway_url": gateway_url,
+            "lease_expires_at": None,
+            "last_error": None,
+            "updated_at": now
+        }}
+    )
+    # Other wallets that uploaded identical content while it was queued share the provisional id
+    await db.irys_uploads.update_many(
+        {"irys_id": upload_id},
+        {"$set": {
+            "irys_id": irys_id,
+            "gateway_url": gateway_url,
+            "size": result.get('size', 0),
+            "status": "done"
+        }}
+    )
+    await record_content_hash(
+        entry["wallet_address"], entry["content_hash"], entry["network"], irys_id, gateway_url, result.get('size', 0)
+    )
+    
+    # Snippet metadata and social data may already reference the provisional id;
+    # flush buffered counters first so none are left keyed by it
+    await counter_buffer.flush()
+    await db.snippet_metadata.update_many({"irys_id": upload_id}, {"$set": {"irys_id": irys_id}})
+    feed_cache.invalidate()
+    await db.snippet_likes.update_many({"snippet_id": upload_id}, {"$set": {"snippet_id": irys_id}})
+    await db.snippet_comments.update_many({"snippet_id": upload_id}, {"$set": {"snippet_id": irys_id}})
+    await db.home_timelines.update_many({"snippet_id": upload_id}, {"$set": {"snippet_id": irys_id}})
+    await publish_event("snippet.resolved", {"snippet_id": upload_id, "irys_id": irys_id})
+    
+    print(f"✅ Successfully uploaded to Irys {entry['network']}: {irys_id} (was {upload_id})")
+
+async def fail_outbox_entry(entry: dict, error: Exception):
+    """Schedule a retry with exponential backoff, or give up after the last attempt."""
+    attempts = entry.get("attempts", 1)
+    now = datetime.utcnow()
+    
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        await db.irys_upload_outbox.update_one(
+            {"id": entry["id"]},
+            {"$set": {
+                "status": "failed",
+                "lease_expires_at": None,
+                "last_error": str(error),
+                "updated_at": now
+            }}
+        )
+        await db.irys_uploads.update_many({"irys_id": entry["id"]}, {"$set": {"status": "failed"}})
+        print(f"❌ Irys upload {entry['id']} failed permanently after {attempts} attempts: {error}")
+        return
+    
+    delay = min(OUTBOX_BASE_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+    delay += random.uniform(0, delay * 0.1)  # Jitter so retries don't stampede the sidecar
+    await db.irys_upload_outbox.update_one(
+        {"id": entry["id"]},
+        {"$set": {
+            "status": "pending",
+            "next_attempt_at": now + timedelta(seconds=delay),
+            "lease_expires_at": None,
+            "last_error": str(error),
+            "updated_at": now
+        }}
+    )
+    print(f"⚠️ Irys upload {entry['id']} attempt {attempts} failed, retrying in {delay:.1f}s: {error}")
+
+async def process_outbox_entry(entry: dict):
+    """Upload a claimed outbox entry to Irys."""
+    encoding = entry.get("encoding")
+    try:
+        content = entry["content"]
+        if encoding:
+            content = base64.b64encode(encode_payload(content, encoding)).decode()
+        result = await call_irys_service('upload', {
+            'content': content,
+            'encoding': encoding,
+            'tags': entry["tags"],
+            'network': entry["network"]
+        })
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else e
+        await fail_outbox_entry(entry, detail)
+        return
+    await complete_outbox_entry(entry, result)
+
+async def outbox_worker(worker_id: int):
+    """Background worker that drains the upload outbox."""
+    while True:
+        try:
+            entry = await claim_outbox_entry()
+            if entry is None:
+                try:
+                    await asyncio.wait_for(outbox_wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                outbox_wakeup.clear()
+                continue
+            await process_outbox_entry(entry)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Outbox worker {worker_id} error: {e}")
+            await asyncio.sleep(OUTBOX_POLL_INTERVAL_SECONDS)
+
+def start_outbox_workers():
+    """Start the pool of outbox workers."""
+    for worker_id in range(OUTBOX_WORKERS):
+        outbox_workers.append(asyncio.create_task(outbox_worker(worker_id)))
+    print(f"✅ Started {len(outbox_workers)} Irys outbox workers")
+
+async def stop_outbox_workers():
+    """Cancel the outbox workers; in-flight entries are reclaimed after their lease expires."""
+    for task in outbox_workers:
+        task.cancel()
+    await asyncio.gather(*outbox_workers, return_exceptions=True)
+    outbox_workers.clear()
+
+# Payload encoding
+# Uploads can be gzip compressed and tagged with Content-Encoding. Readers sniff
+# the magic bytes, so compressed and plain transactions decode the same way. gzip
+# is the only encoding because browsers decode it natively (DecompressionStream).
+PAYLOAD_ENCODINGS = ("gzip",)
+GZIP_MAGIC = b"\x1f\x8b"
+
+def encode_payload(content: str, encoding: Optional[str]) -> bytes:
+    """Compress the payload with the requested encoding."""
+    raw = content.encode()
+    if encoding == "gzip":
+        return gzip.compress(raw)
+    return raw
+
+def decode_payload(raw) -> bytes:
+    """Decompress a gateway payload if it is gzip encoded.
+    
+    Accepts any bytes-like object, including memory-mapped cache files.
+    """
+    if raw[:2] == GZIP_MAGIC:
+        return gzip.decompress(raw)
+    return bytes(raw)
+
+# Local Irys content cache
+# Irys transactions are immutable, so payloads are cached forever, keyed by irys_id:
+# an in-memory LRU sits in front of an on-disk store, and large blobs are read
+# back through mmap instead of being kept in memory.
+class ImmutableContentCache:
+    ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+    
+    def __init__(self, root: Path, memory_bytes: int, mmap_threshold: int):
+        self.root = root
+        self.memory_bytes = memory_bytes
+        self.mmap_threshold = mmap_threshold
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0, "miss": 0}
+    
+    def path_for(self, irys_id: str) -> Optional[Path]:
+        if not self.ID_PATTERN.match(irys_id):
+            return None
+        return self.root / irys_id[:2] / irys_id
+    
+    def get_from_memory(self, irys_id: str):
+        with self.lock:
+            raw = self.memory.get(irys_id)
+            if raw is not None:
+                self.memory.move_to_end(irys_id)
+                self.hits["memory"] += 1
+            return raw
+    
+    def remember(self, irys_id: str, raw: bytes):
+        """Keep small payloads in the memory LRU, evicting least recently used ones."""
+        if len(raw) >= self.mmap_threshold or len(raw) > self.memory_bytes:
+            return
+        with self.lock:
+            if irys_id in self.memory:
+                return
+            self.memory[irys_id] = raw
+            self.memory_used += len(raw)
+            while self.memory_used > self.memory_bytes:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_used -= len(evicted)
+    
+    def get_from_disk(self, irys_id: str):
+        path = self.path_for(irys_id)
+        if path is None or not path.exists():
+            self.hits["miss"] += 1
+            return None
+        
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= self.mmap_threshold:
+                # Large blobs are decoded straight from the mapping
+                raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                raw = f.read()
+                self.remember(irys_id, raw)
+        self.hits["disk"] += 1
+        return raw
+    
+    def put(self, irys_id: str, raw: bytes):
+        """Write a payload once; existing entries never change."""
+        path = self.path_for(irys_id)
+        if path is None:
+            return
+        self.remember(irys_id, raw)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+    
+    async def get(self, irys_id: str):
+        raw = self.get_from_memory(irys_id)
+        if raw is not None:
+            return raw
+        return await asyncio.to_thread(self.get_from_disk, irys_id)
+    
+    async def put_async(self, irys_id: str, raw: bytes):
+        try:
+            await asyncio.to_thread(self.put, irys_id, raw)
+        except OSError as e:
+            print(f"⚠️ Could not cache Irys payload {irys_id}: {e}")
+    
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_used,
+            **self.hits
+        }
+
+content_cache = ImmutableContentCache(CONTENT_CACHE_DIR, CONTENT_CACHE_MEMORY_BYTES, CONTENT_CACHE_MMAP_THRESHOLD)
+
+# Irys gateway reads
+# One pooled aiohttp session serves all gateway fetches; a semaphore bounds how many
+# run at once and every fetch carries its own timeout.
+gateway_session = None
+
+def get_gateway_session() -> aiohttp.ClientSession:
+    """Return the shared gateway session, creating it on first use."""
+    global gateway_session
+    if gateway_session is None or gateway_session.closed:
+        gateway_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=GATEWAY_CONCURRENCY, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=GATEWAY_ITEM_TIMEOUT_SECONDS)
+        )
+    return gateway_session
+
+async def close_gateway_session():
+    if gateway_session is not None and not gateway_session.closed:
+        await gateway_session.close()
+
+# Ids minted locally that will never exist on the gateway
+SYNTHETIC_ID_PREFIXES = ("mock_", "fallback_", "pending_")
+
+class NegativeCache:
+    """Remembers ids that 404'd or timed out and backs off exponentially before retrying them."""
+    
+    def __init__(self, base_seconds: float, max_seconds: float, max_entries: int):
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # irys_id -> (failures, retry_at)
+    
+    def should_skip(self, irys_id: str) -> bool:
+        entry = self.entries.get(irys_id)
+        return entry is not None and time.monotonic() < entry[1]
+    
+    def record_failure(self, irys_id: str):
+        failures = self.entries.pop(irys_id, (0, 0))[0] + 1
+        delay = min(self.base_seconds * (2 ** (failures - 1)), self.max_seconds)
+        self.entries[irys_id] = (failures, time.monotonic() + delay)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def forget(self, irys_id: str):
+        self.entries.pop(irys_id, None)
+
+class CircuitBreaker:
+    """Stops calls to a gateway after repeated failures, probing again after a cool-down.
+    
+    closed: calls flow; open: calls are rejected until reset_seconds pass;
+    half_open: a single probe is let through and its outcome closes or reopens the circuit.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+    
+    def record_abandoned(self):
+        """The probe was cancelled without a verdict; let the next call probe instead."""
+        self.probe_in_flight = False
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"⚠️ Gateway circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+negative_cache = NegativeCache(NEGATIVE_CACHE_BASE_SECONDS, NEGATIVE_CACHE_MAX_SECONDS, NEGATIVE_CACHE_MAX_ENTRIES)
+gateway_breakers = {}
+
+def get_gateway_breaker(host: str) -> CircuitBreaker:
+    if host not in gateway_breakers:
+        gateway_breakers[host] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+    return gateway_breakers[host]
+
+async def fetch_gateway_snippet(irys_id: str, semaphore: asyncio.Semaphore):
+    """Fetch and decode one snippet payload, from the local cache or the gateway; None if unavailable."""
+    if irys_id.startswith(SYNTHETIC_ID_PREFIXES) or negative_cache.should_skip(irys_id):
+        return None
+    
+    gateway_host = "gateway.irys.xyz"
+    gateway_url = f"https://{gateway_host}/{irys_id}"
+    breaker = get_gateway_breaker(gateway_host)
+    try:
+        raw = await content_cache.get(irys_id)
+        if raw is not None:
+            try:
+                return json.loads(decode_payload(raw))
+            finally:
+                if isinstance(raw, mmap.mmap):
+                    raw.close()
+        
+        async with semaphore:
+            if not breaker.allow():
+                return None
+            probing = breaker.state == "half_open"
+            try:
+                async with get_gateway_session().get(gateway_url) as response:
+                    if response.status >= 500:
+                        breaker.record_failure()
+                        return None
+                    # Any other answer means the gateway itself is healthy
+                    breaker.record_success()
+                    if response.status == 404:
+                        negative_cache.record_failure(irys_id)
+                        return None
+                    if response.status != 200:
+                        return None
+                    raw = await response.read()
+            except asyncio.TimeoutError:
+                breaker.record_failure()
+                negative_cache.record_failure(irys_id)
+                raise
+            except aiohttp.ClientError:
+                breaker.record_failure()
+                raise
+            except asyncio.CancelledError:
+                # Cancelled at the query deadline: a half-open probe must not stay in flight forever
+                if probing and breaker.state == "half_open":
+                    breaker.record_abandoned()
+                raise
+        
+        negative_cache.forget(irys_id)
+        data = json.loads(decode_payload(raw))
+        await content_cache.put_async(irys_id, raw)
+        return data
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"⚠️ Error fetching snippet {irys_id}: {e or type(e).__name__}")
+        return None
+
+async def fetch_gateway_snippets(irys_ids: List[str], deadline: float = QUERY_DEADLINE_SECONDS):
+    """Fetch many snippets in parallel, giving up on stragglers at the deadline.
+    
+    Returns a dict of irys_id -> payload for the fetches that succeeded and the
+    number of fetches still outstanding when the deadline expired.
+    """
+    semaphore = asyncio.Semaphore(GATEWAY_CONCURRENCY)
+    tasks = {asyncio.create_task(fetch_gateway_snippet(irys_id, semaphore)): irys_id for irys_id in irys_ids}
+    if not tasks:
+        return {}, 0
+    
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    
+    results = {}
+    for task in done:
+        data = task.result()
+        if data is not None:
+            results[tasks[task]] = data
+    return results, len(pending)
+
 async def call_claude_api(api_key: str, user_prompt: str, system_message: str) -> str:
     """Direct Claude API call using HTTP requests."""
     try:
@@ -358,6 +1377,30 @@ async def call_claude_api(api_key: str, user_prompt: str, system_message: str) -
             return "A general analysis of the provided content|content,analysis,general|neutral|general"
 
 # Utility functions
+def encode_cursor(timestamp: datetime, object_id) -> str:
+    """Encode a (timestamp, _id) keyset position as an opaque cursor."""
+    payload = json.dumps({"t": timestamp.isoformat(), "id": str(object_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from encode_cursor back into (timestamp, ObjectId)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(field: str, cursor: Optional[str]) -> dict:
+    """Filter for documents after the cursor in (field, _id) descending order."""
+    if not cursor:
+        return {}
+    timestamp, object_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": timestamp}},
+        {field: timestamp, "_id": {"$lt": object_id}}
+    ]}
+
 def clean_text(text: str) -> str:
     """Clean extracted text by removing extra whitespace and special characters."""
     text = re.sub(r'\s+', ' ', text.strip())
@@ -617,13 +1660,16 @@ async def summarize_snippet(request: SummarizeRequest):
 
 @api_router.post("/irys-upload", response_model=IrysUploadResponse)
 async def upload_to_irys_blockchain(request: IrysUploadRequest):
-    """Upload data to REAL Irys blockchain."""
+    """Queue data for upload to REAL Irys blockchain and return a provisional id."""
+    if request.encoding not in (None, *PAYLOAD_ENCODINGS):
+        raise HTTPException(status_code=400, detail=f"Unsupported encoding: {request.encoding}")
+    
     try:
         # Parse the data to get network info
         data_obj = json.loads(request.data)
         network = data_obj.get('network', 'devnet')
         
-        print(f"🔗 Uploading to Irys {network} for wallet: {request.address}")
+        print(f"🔗 Queueing Irys {network} upload for wallet: {request.address}")
         
         # Prepare tags for blockchain storage
         tags = [
@@ -634,82 +1680,289 @@ async def upload_to_irys_blockchain(request: IrysUploadRequest):
             *request.tags
         ]
         
-        # Call Irys service to upload to blockchain
-        result = await call_irys_service('upload', {
-            'content': request.data,
-            'tags': tags,
-            'network': network
-        })
-        
-        print(f"✅ Successfully uploaded to Irys {network}: {result['id']}")
+        # Byte-identical content already stored (or queued) on this network is reused
+        content_hash = content_hash_for(request.data)
+        existing = await find_existing_upload(request.address, content_hash, network)
+        if existing and existing.get("irys_id"):
+            print(f"♻️ Reusing Irys transaction {existing['irys_id']} for identical content")
+            await db.irys_uploads.update_one(
+                {"wallet_address": request.address, "irys_id": existing["irys_id"]},
+                {"$setOnInsert": {
+                    "wallet_address": request.address,
+                    "irys_id": existing["irys_id"],
+                    "gateway_url": existing["gateway_url"],
+                    "timestamp": datetime.utcnow(),
+                    "network": network,
+                    "size": existing.get("size", 0),
+                    "status": "done",
+                    **snippet_display_fields(data_obj)
+                }},
+                upsert=True
+            )
+            return IrysUploadResponse(
+                id=existing["irys_id"],
+                gateway_url=existing["gateway_url"],
+                timestamp=int(existing["created_at"].timestamp() * 1000),
+                message=f"Identical content is already stored on Irys {network}; reused the existing transaction.",
+                status="done"
+            )
+        if existing:
+            print(f"♻️ Identical content already queued as {existing['id']}")
+            return IrysUploadResponse(
+                id=existing["id"],
+                gateway_url="",
+                timestamp=int(existing["created_at"].timestamp() * 1000),
+                message=f"Identical content is already queued for Irys {network}. Track it at /api/irys-upload/status/{existing['id']}",
+                status=existing["status"],
+                upload_id=existing["id"]
+            )
         
-        # Determine gateway URL based on network
-        if network == 'devnet':
-            gateway_url = f"https://devnet.irys.xyz/{result['id']}"
-        else:
-            gateway_url = f"https://gateway.irys.xyz/{result['id']}"
+        entry = await enqueue_irys_upload(
+            request.address, request.data, tags, network, content_hash,
+            snippet_display_fields(data_obj), request.encoding
+        )
         
-        # Save metadata to our database for querying
-        metadata = {
-            "wallet_address": request.address,
-            "irys_id": result['id'],
-            "gateway_url": gateway_url,
-            "timestamp": datetime.utcnow(),
-            "network": network,
-            "size": result.get('size', 0)
-        }
-        await db.irys_uploads.insert_one(metadata)
+        # Without a worker pool (e.g. serverless with lifespan off) upload inline
+        if not outbox_workers:
+            claimed = await claim_outbox_entry(entry["id"])
+            if claimed:
+                await process_outbox_entry(claimed)
+            entry = await db.irys_upload_outbox.find_one({"id": entry["id"]})
+        
+        if entry["status"] == "done":
+            return IrysUploadResponse(
+                id=entry["irys_id"],
+                gateway_url=entry["gateway_url"],
+                timestamp=int(entry["updated_at"].timestamp() * 1000),
+                message=f"Successfully uploaded to Irys {network}! {'FREE' if network == 'devnet' else 'Paid'} storage.",
+                status="done",
+                upload_id=entry["id"]
+            )
         
         return IrysUploadResponse(
-            id=result['id'],
-            gateway_url=gateway_url,
-            timestamp=result.get('timestamp', int(datetime.utcnow().timestamp() * 1000)),
-            message=f"Successfully uploaded to Irys {network}! {'FREE' if network == 'devnet' else 'Paid'} storage."
+            id=entry["id"],
+            gateway_url="",
+            timestamp=int(entry["created_at"].timestamp() * 1000),
+            message=f"Upload to Irys {network} queued. Track it at /api/irys-upload/status/{entry['id']}",
+            status=entry["status"],
+            upload_id=entry["id"]
         )
         
     except Exception as e:
         print(f"❌ Irys upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Blockchain upload failed: {str(e)}")
 
+@api_router.get("/irys-upload/status/{upload_id}")
+async def get_irys_upload_status(upload_id: str):
+    """Get the state of a queued Irys upload."""
+    try:
+        entry = await db.irys_upload_outbox.find_one({"id": upload_id})
+        if not entry:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        
+        # Without a worker pool, polling the status drives due retries
+        if not outbox_workers and entry["status"] in ("pending", "uploading"):
+            claimed = await claim_outbox_entry(upload_id)
+            if claimed:
+                await process_outbox_entry(claimed)
+                entry = await db.irys_upload_outbox.find_one({"id": upload_id})
+        
+        return {
+            "upload_id": entry["id"],
+            "status": entry["status"],
+            "irys_id": entry.get("irys_id"),
+            "gateway_url": entry.get("gateway_url"),
+            "network": entry["network"],
+            "attempts": entry["attempts"],
+            "last_error": entry.get("last_error"),
+            "next_attempt_at": entry.get("next_attempt_at") if entry["status"] == "pending" else None,
+            "created_at": entry["created_at"],
+            "updated_at": entry["updated_at"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching upload status: {str(e)}")
+
+@api_router.get("/irys-upload/outbox")
+async def get_irys_outbox_summary():
+    """Count outbox entries by state (pending, uploading, done, failed)."""
+    try:
+        counts = {"pending": 0, "uploading": 0, "done": 0, "failed": 0}
+        async for row in db.irys_upload_outbox.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]):
+            counts[row["_id"]] = row["count"]
+        return {"counts": counts, "workers": len(outbox_workers)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching outbox summary: {str(e)}")
+
+async def resolve_upload_batch(uploads: List[dict], verify: bool = False,
+                               deadline: float = QUERY_DEADLINE_SECONDS):
+    """Turn irys_uploads documents into snippets, consulting the gateway only when needed.
+    
+    Uploads recorded before the read model existed are backfilled from the gateway
+    once; with verify every transaction is checked. Returns the snippets and the
+    number of gateway fetches cut off by the deadline.
+    """
+    legacy_ids = [upload['irys_id'] for upload in uploads if 'title' not in upload]
+    fetch_ids = [upload['irys_id'] for upload in uploads] if verify else legacy_ids
+    payloads, unresolved = await fetch_gateway_snippets(fetch_ids, deadline) if fetch_ids else ({}, 0)
+    
+    backfill = []
+    for upload in uploads:
+        data = payloads.get(upload['irys_id'])
+        if data is not None and 'title' not in upload:
+            display = snippet_display_fields(data)
+            upload.update(display)
+            backfill.append(UpdateOne({"_id": upload["_id"]}, {"$set": display}))
+    if backfill:
+        await db.irys_uploads.bulk_write(backfill, ordered=False)
+    
+    snippets = []
+    for upload in uploads:
+        if 'title' not in upload:
+            continue
+        snippet = snippet_from_upload(upload)
+        if verify:
+            snippet["verified"] = upload['irys_id'] in payloads
+        snippets.append(snippet)
+    
+    if verify:
+        verified_ids = [snippet["irys_id"] for snippet in snippets if snippet["verified"]]
+        if verified_ids:
+            await db.irys_uploads.update_many(
+                {"_id": {"$in": [upload["_id"] for upload in uploads if upload['irys_id'] in verified_ids]}},
+                {"$set": {"verified_at": datetime.utcnow()}}
+            )
+    
+    return snippets, unresolved
+
+async def stream_irys_snippets(query: dict, limit: Optional[int], verify: bool):
+    """Yield NDJSON lines: one snippet per line, then a trailer with next_cursor.
+    
+    With verify every row waits for the gateway, so rows are checked in batches
+    against a single deadline for the whole stream rather than one per batch.
+    """
+    cursor = db.irys_uploads.find(query).sort([("timestamp", -1), ("_id", -1)]).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    count = 0
+    unresolved = 0
+    last = None
+    batch = []
+    loop = asyncio.get_running_loop()
+    stream_deadline = loop.time() + QUERY_DEADLINE_SECONDS
+    
+    async def flush(batch):
+        deadline = max(0.0, stream_deadline - loop.time()) if verify else QUERY_DEADLINE_SECONDS
+        snippets, missing = await resolve_upload_batch(batch, verify, deadline)
+        return [json.dumps(snippet, default=str) + "\n" for snippet in snippets], missing
+    
+    async for upload in cursor:
+        batch.append(upload)
+        count += 1
+        last = upload
+        # Read-model rows resolve instantly unless verifying; legacy rows wait for the gateway
+        if len(batch) >= STREAM_BATCH_SIZE or ('title' in upload and not verify):
+            lines, missing = await flush(batch)
+            unresolved += missing
+            batch = []
+            for line in lines:
+                yield line
+    if batch:
+        lines, missing = await flush(batch)
+        unresolved += missing
+        for line in lines:
+            yield line
+    
+    has_more = bool(limit) and count == limit
+    yield json.dumps({
+        "next_cursor": encode_cursor(last["timestamp"], last["_id"]) if has_more else None,
+        "has_more": has_more,
+        "unresolved": unresolved
+    }) + "\n"
+
 @api_router.get("/irys-query/{wallet_address}")
-async def query_irys_snippets(wallet_address: str):
-    """Query snippets from Irys blockchain for a wallet."""
+async def query_irys_snippets(wallet_address: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                              stream: bool = False, verify: bool = False):
+    """Query a wallet's Irys snippets from the read model, newest first.
+    
+    Pages are keyed by (timestamp, _id): pass the returned next_cursor to get the
+    next page. With stream=true the response is NDJSON, one snippet per line as it
+    is resolved, followed by a trailer line holding next_cursor and has_more.
+    Pass verify=true to also confirm each transaction resolves on the gateway.
+    """
     try:
-        print(f"🔍 Querying Irys blockchain for wallet: {wallet_address}")
+        print(f"🔍 Querying Irys snippets for wallet: {wallet_address}")
         
-        # Query our database for Irys uploads from this wallet
-        uploads = await db.irys_uploads.find({"wallet_address": wallet_address}).to_list(1000)
+        query = {
+            "wallet_address": wallet_address,
+            "status": {"$ne": "failed"},
+            **keyset_filter("timestamp", cursor)
+        }
         
-        snippets = []
-        for upload in uploads:
-            try:
-                # Fetch the actual data from Irys gateway
-                gateway_url = f"https://gateway.irys.xyz/{upload['irys_id']}"
-                response = requests.get(gateway_url, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    snippets.append({
-                        "id": upload['irys_id'],
-                        "irys_id": upload['irys_id'],
-                        "url": data.get('url', ''),
-                        "title": data.get('title', 'Untitled'),
-                        "summary": data.get('summary', ''),
-                        "tags": data.get('tags', []),
-                        "timestamp": upload['timestamp'],
-                        "gateway_url": gateway_url,
-                        "network": "irys"
-                    })
-            except Exception as e:
-                print(f"⚠️ Error fetching snippet {upload['irys_id']}: {e}")
-                continue
+        if stream:
+            # Streams are unbounded unless a limit is given
+            limit = max(1, limit) if limit else None
+            return StreamingResponse(
+                stream_irys_snippets(query, limit, verify),
+                media_type="application/x-ndjson"
+            )
+        
+        limit = min(max(1, limit or QUERY_PAGE_SIZE), QUERY_MAX_PAGE_SIZE)
+        uploads = await db.irys_uploads.find(query).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
         
+        has_more = len(uploads) > limit
+        uploads = uploads[:limit]
+        snippets, unresolved = await resolve_upload_batch(uploads, verify)
+        next_cursor = encode_cursor(uploads[-1]["timestamp"], uploads[-1]["_id"]) if has_more else None
+        
+        if unresolved:
+            print(f"⚠️ Query deadline hit with {unresolved} gateway fetches outstanding")
         print(f"✅ Found {len(snippets)} snippets for wallet {wallet_address}")
-        return {"snippets": snippets}
+        return {
+            "snippets": snippets,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "partial": unresolved > 0,
+            "unresolved": unresolved
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+@api_router.get("/irys-cache/stats")
+async def get_irys_cache_stats():
+    """Hit counters of the local Irys content cache, plus negative cache and circuit state."""
+    return {
+        **content_cache.stats(),
+        "negative_entries": len(negative_cache.entries),
+        "gateway_circuits": {host: breaker.state for host, breaker in gateway_breakers.items()}
+    }
+
+@api_router.get("/irys-balance")
+async def get_irys_balance():
+    """Get the backend wallet's Irys balance from the cache, with its age."""
+    cache = await get_cached_balance()
+    if cache["value"] is None:
+        raise HTTPException(status_code=503, detail=f"Irys balance unavailable: {cache['error']}")
+    
+    age = balance_age_seconds()
+    return {
+        "balance": cache["value"],
+        "fetched_at": cache["fetched_at"].isoformat(),
+        "age_seconds": round(age, 3),
+        "stale": age > BALANCE_CACHE_TTL_SECONDS,
+        "error": cache["error"]
+    }
+
 # NEW SOCIAL FEATURES ENDPOINTS
 
 @api_router.post("/users/profile")
@@ -728,11 +1981,15 @@ async def create_user_profile(request: CreateUserProfile):
             )
             updated_profile = await db.user_profiles.find_one({"wallet_address": request.wallet_address})
             updated_profile["_id"] = str(updated_profile["_id"])
+            profile_cache.invalidate(request.wallet_address)
+            feed_cache.invalidate()  # Cached pages carry usernames
             return updated_profile
         else:
             # Create new profile
             profile = UserProfile(**request.dict())
             await db.user_profiles.insert_one(profile.dict())
+            profile_cache.invalidate(request.wallet_address)
+            feed_cache.invalidate()
             return profile
             
     except Exception as e:
@@ -759,49 +2016,633 @@ async def get_user_profile(wallet_address: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching profile: {str(e)}")
 
+class ProfileCache:
+    """LRU + TTL cache of wallet -> profile summary (username, avatar) for enrichment.
+    
+    Misses are filled with one $in query per batch. Wallets without a profile are
+    cached as None so they do not hit Mongo on every render. Entries are dropped by
+    create_user_profile; other workers see changes once the TTL expires.
+    """
+    
+    FIELDS = ("username", "avatar_url")
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # wallet -> (summary or None, expires_at)
+    
+    async def get_many(self, wallets) -> dict:
+        """Summaries for the given wallets (None where no profile exists)."""
+        now = time.monotonic()
+        found = {}
+        misses = []
+        for wallet in set(wallets):
+            entry = self.entries.get(wallet)
+            if entry and entry[1] > now:
+                self.entries.move_to_end(wallet)
+                found[wallet] = entry[0]
+            else:
+                misses.append(wallet)
+        
+        if misses:
+            profiles = await db.user_profiles.find(
+                {"wallet_address": {"$in": misses}},
+                {"_id": 0, "wallet_address": 1, **{field: 1 for field in self.FIELDS}}
+            ).to_list(None)
+            loaded = {profile.pop("wallet_address"): profile for profile in profiles}
+            for wallet in misses:
+                found[wallet] = loaded.get(wallet)
+                self.entries[wallet] = (found[wallet], now + self.ttl)
+                self.entries.move_to_end(wallet)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return found
+    
+    async def username(self, wallet: str) -> Optional[str]:
+        summary = (await self.get_many([wallet]))[wallet]
+        return summary.get("username") if summary else None
+    
+    def invalidate(self, wallet: Optional[str] = None):
+        if wallet is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(wallet, None)
+
+profile_cache = ProfileCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+
+async def build_feed_items(snippets: List[dict]) -> List[dict]:
+    """Assemble feed items for a page of snippet_metadata documents.
+    
+    Social counts are denormalized on the snippet and profiles are fetched with
+    one batched query, so the number of round trips does not grow with the page size.
+    """
+    if not snippets:
+        return []
+    
+    profiles = await profile_cache.get_many(snippet["wallet_address"] for snippet in snippets)
+    usernames = {wallet: profile.get("username") for wallet, profile in profiles.items() if profile}
+    
+    feed_items = []
+    for snippet in snippets:
+        feed_item = PublicSnippet(
+            id=snippet["id"],
+            irys_id=snippet["irys_id"],
+            wallet_address=snippet["wallet_address"],
+            username=usernames.get(snippet["wallet_address"]),
+            url=snippet.get("url"),  # Optional for non-web content
+            title=snippet["title"],
+            summary=snippet["summary"],
+            tags=snippet["tags"],
+            network=snippet["network"],
+            content_type=snippet.get("content_type", "web_snippet"),
+            mood=snippet.get("mood"),
+            theme=snippet.get("theme"),
+            created_at=snippet["timestamp"],
+            likes_count=snippet.get("likes_count", 0),
+            comments_count=snippet.get("comments_count", 0)
+        )
+        feed_items.append(feed_item.dict())
+    return feed_items
+
+class FeedPageCache:
+    """In-memory cache of the first few public feed pages.
+    
+    Writes that change the feed bump a version number. A page stamped with an
+    older version (or past its TTL) is still served while a single background
+    refresh rebuilds it, as long as it went stale (was invalidated or expired)
+    less than max_stale_seconds ago; after that, the next reader rebuilds it
+    inline. Only pages reachable from the head of the feed through next_cursor
+    links are cached.
+    """
+    
+    def __init__(self, pages: int, ttl_seconds: float, max_stale_seconds: float):
+        self.pages = pages
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.version = 0
+        self.entries = {}  # (cursor, limit) -> {"page", "version", "stored_at", "index"}
+        self.page_index = {}  # (cursor, limit) -> page number for cursors linked from cached pages
+        self.inflight = {}
+    
+    def invalidate(self):
+        self.version += 1
+        now = time.monotonic()
+        for entry in self.entries.values():
+            entry.setdefault("stale_since", now)
+    
+    def is_hot(self, cursor: Optional[str], limit: int) -> bool:
+        if cursor is None:
+            return self.pages > 0
+        index = self.page_index.get((cursor, limit))
+        return index is not None and index < self.pages
+    
+    async def get(self, cursor: Optional[str], limit: int, loader):
+        key = (cursor, limit)
+        entry = self.entries.get(key)
+        if entry:
+            now = time.monotonic()
+            expires_at = entry["stored_at"] + self.ttl_seconds
+            if entry["version"] == self.version and now < expires_at:
+                return entry["page"]
+            stale_since = min(entry.get("stale_since", expires_at), expires_at)
+            if now - stale_since < self.max_stale_seconds:
+                self.refresh(key, loader)
+                return entry["page"]
+        return await self.refresh(key, loader)
+    
+    def refresh(self, key, loader) -> asyncio.Task:
+        """Start (or join) the single in-flight rebuild of a page."""
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self.load(key, loader))
+            task.add_done_callback(self.log_failure)
+            self.inflight[key] = task
+        return task
+    
+    async def load(self, key, loader):
+        # Stamp with the version seen before loading so writes during the load trigger another refresh
+        version = self.version
+        try:
+            page = await loader()
+        finally:
+            self.inflight.pop(key, None)
+        
+        cursor, limit = key
+        index = 0 if cursor is None else self.page_index.get(key, self.pages)
+        now = time.monotonic()
+        self.entries[key] = {"page": page, "version": version, "stored_at": now, "index": index}
+        if version != self.version:
+            self.entries[key]["stale_since"] = now  # Invalidated while loading
+        if page["next_cursor"] and index + 1 < self.pages:
+            self.page_index[(page["next_cursor"], limit)] = index + 1
+        self.prune()
+        return page
+    
+    def prune(self):
+        """Drop pages and cursor links no longer reachable from a cached head page."""
+        live = set()
+        for (cursor, limit), entry in self.entries.items():
+            if cursor is not None:
+                continue
+            key = (cursor, limit)
+            while key in self.entries and key not in live:
+                live.add(key)
+                next_cursor = self.entries[key]["page"]["next_cursor"]
+                key = (next_cursor, limit)
+            if key[0] is not None:
+                live.add(key)  # Linked page not loaded yet
+        self.entries = {key: entry for key, entry in self.entries.items() if key in live}
+        self.page_index = {key: index for key, index in self.page_index.items() if key in live}
+    
+    @staticmethod
+    def log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ Feed page refresh failed: {task.exception()}")
+
+feed_cache = FeedPageCache(FEED_CACHE_PAGES, FEED_CACHE_TTL_SECONDS, FEED_CACHE_MAX_STALE_SECONDS)
+
+async def personalize_feed_page(page: dict, viewer: Optional[str]) -> dict:
+    """Fill in is_liked for the viewer with one batched query per page.
+    
+    Returns a copy so cached, viewer-agnostic pages are never mutated.
+    Bookmarks are not stored yet, so is_bookmarked stays False.
+    """
+    if not viewer or not page["feed"]:
+        return page
+    
+    liked = await db.snippet_likes.find(
+        {
+            "user_address": viewer,
+            "snippet_id": {"$in": [item["irys_id"] for item in page["feed"]]},
+            "active": {"$ne": False}
+        },
+        {"snippet_id": 1}
+    ).to_list(None)
+    liked_ids = {like["snippet_id"] for like in liked}
+    return {
+        **page,
+        "feed": [{**item, "is_liked": item["irys_id"] in liked_ids} for item in page["feed"]]
+    }
+
+async def load_public_feed_page(cursor: Optional[str], limit: int, skip: int = 0) -> dict:
+    """Read one public feed page from Mongo."""
+    # Get recent snippets from all users, one extra to know whether more exist
+    query = db.snippet_metadata.find(
+        {"is_public": True, **keyset_filter("timestamp", cursor)}
+    ).sort([("timestamp", -1), ("_id", -1)])
+    if skip and not cursor:
+        query = query.skip(skip)
+    snippets = await query.limit(limit + 1).to_list(limit + 1)
+    
+    has_more = len(snippets) > limit
+    snippets = snippets[:limit]
+    feed_items = await build_feed_items(snippets)
+    next_cursor = encode_cursor(snippets[-1]["timestamp"], snippets[-1]["_id"]) if has_more else None
+    
+    return {"feed": feed_items, "has_more": has_more, "next_cursor": next_cursor}
+
 @api_router.get("/feed/public")
-async def get_public_feed(skip: int = 0, limit: int = 20):
-    """Get public feed of all snippets with social data."""
+async def get_public_feed(cursor: Optional[str] = None, limit: int = 20, skip: int = 0,
+                          viewer: Optional[str] = None):
+    """Get public feed of all snippets with social data.
+    
+    Pages are keyed by (timestamp, _id); pass the returned next_cursor to continue.
+    skip is still honoured for old clients but costs O(skip) on the server.
+    The first FEED_CACHE_PAGES pages are served from memory. Pass the viewer's
+    wallet to get is_liked filled in.
+    """
+    try:
+        limit = min(max(1, limit), FEED_MAX_PAGE_SIZE)
+        
+        if not skip and feed_cache.is_hot(cursor, limit):
+            page = await feed_cache.get(cursor, limit, lambda: load_public_feed_page(cursor, limit))
+        else:
+            page = await load_public_feed_page(cursor, limit, skip)
+        return await personalize_feed_page(page, viewer)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching feed: {str(e)}")
+
+# Home timelines
+# Snippets are pushed into each follower's home_timelines entries by a background
+# fan-out worker when they are saved (fan-out-on-write). Authors with more than
+# CELEBRITY_FOLLOWER_THRESHOLD followers are skipped at write time and merged in
+# when a follower reads their timeline instead (fan-out-on-read). New follows and
+# authors dropping back below the threshold get their recent snippets backfilled.
+fanout_queue = asyncio.Queue()
+fanout_task = None
+celebrity_cache = {"wallets": [], "loaded_at": None}
+
+def timeline_entry(owner: str, snippet_id: str, author: str, timestamp: datetime) -> UpdateOne:
+    """Idempotent upsert of one snippet reference into an owner's timeline."""
+    return UpdateOne(
+        {"owner_address": owner, "snippet_id": snippet_id},
+        {"$setOnInsert": {
+            "owner_address": owner,
+            "snippet_id": snippet_id,
+            "author_address": author,
+            "timestamp": timestamp
+        }},
+        upsert=True
+    )
+
+async def recent_public_snippets(author: str) -> List[dict]:
+    """The author's newest public snippets, as much as a timeline backfill needs."""
+    return await db.snippet_metadata.find(
+        {"wallet_address": author, "is_public": True},
+        {"irys_id": 1, "timestamp": 1}
+    ).sort([("timestamp", -1), ("_id", -1)]).limit(TIMELINE_BACKFILL_COUNT).to_list(TIMELINE_BACKFILL_COUNT)
+
+async def write_timeline_entries(operations: List[UpdateOne]):
+    """Apply timeline upserts; entries a concurrent writer inserted first are fine."""
+    try:
+        await db.home_timelines.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if not is_duplicate_key_error(e):
+            raise
+
+async def backfill_timeline(owner: str, authors: List[str]):
+    """Push the recent public snippets of newly followed authors into a timeline."""
+    operations = []
+    for author in authors:
+        for snippet in await recent_public_snippets(author):
+            operations.append(timeline_entry(owner, snippet["irys_id"], author, snippet["timestamp"]))
+    if operations:
+        await write_timeline_entries(operations)
+
+async def fan_out_snippet(job: dict):
+    """Push a snippet reference into the author's and their followers' timelines."""
+    author = job["author_address"]
+    profile = await db.user_profiles.find_one({"wallet_address": author}, {"followers_count": 1, "timeline_pull": 1})
+    is_celebrity = bool(profile) and profile.get("followers_count", 0) >= CELEBRITY_FOLLOWER_THRESHOLD
+    
+    operations = [timeline_entry(author, job["snippet_id"], author, job["timestamp"])]
+    if is_celebrity:
+        if not profile.get("timeline_pull"):
+            # Remember that followers only see this author's posts through pulls
+            await db.user_profiles.update_one({"wallet_address": author}, {"$set": {"timeline_pull": True}})
+    else:
+        pushed = [(job["snippet_id"], job["timestamp"])]
+        if profile and profile.get("timeline_pull"):
+            # Back below the threshold: posts that were only pulled on read are pushed now
+            pushed += [
+                (snippet["irys_id"], snippet["timestamp"])
+                for snippet in await recent_public_snippets(author)
+                if snippet["irys_id"] != job["snippet_id"]
+            ]
+        async for follow in db.user_follows.find({"following_address": author}, {"follower_address": 1}):
+            for snippet_id, timestamp in pushed:
+                operations.append(timeline_entry(follow["follower_address"], snippet_id, author, timestamp))
+            if len(operations) >= FANOUT_BATCH_SIZE:
+                await write_timeline_entries(operations)
+                operations = []
+    if operations:
+        await write_timeline_entries(operations)
+    if not is_celebrity and profile and profile.get("timeline_pull"):
+        await db.user_profiles.update_one({"wallet_address": author}, {"$unset": {"timeline_pull": ""}})
+
+async def fanout_worker():
+    """Background worker that drains the fan-out queue."""
+    while True:
+        job = await fanout_queue.get()
+        try:
+            await fan_out_snippet(job)
+        except Exception as e:
+            print(f"⚠️ Timeline fan-out failed for {job['snippet_id']}: {e}")
+        finally:
+            fanout_queue.task_done()
+
+async def enqueue_fanout(snippet: dict):
+    """Queue a saved public snippet for fan-out (inline when no worker is running)."""
+    job = {
+        "snippet_id": snippet["irys_id"],
+        "author_address": snippet["wallet_address"],
+        "timestamp": snippet["timestamp"]
+    }
+    if fanout_task and not fanout_task.done():
+        fanout_queue.put_nowait(job)
+    else:
+        await fan_out_snippet(job)
+
+async def get_celebrity_wallets() -> List[str]:
+    """Wallets whose snippets are pulled on read, cached briefly.
+    
+    That is authors above the fan-out threshold, plus authors that dropped below
+    it but have not posted since, whose earlier snippets were never pushed.
+    """
+    loaded_at = celebrity_cache["loaded_at"]
+    if loaded_at is None or time.monotonic() - loaded_at > CELEBRITY_CACHE_TTL_SECONDS:
+        profiles = await db.user_profiles.find(
+            {"$or": [{"followers_count": {"$gte": CELEBRITY_FOLLOWER_THRESHOLD}}, {"timeline_pull": True}]},
+            {"wallet_address": 1}
+        ).to_list(None)
+        celebrity_cache["wallets"] = [profile["wallet_address"] for profile in profiles]
+        celebrity_cache["loaded_at"] = time.monotonic()
+    return celebrity_cache["wallets"]
+
+@api_router.get("/feed/home/{wallet_address}")
+async def get_home_feed(wallet_address: str, cursor: Optional[str] = None, limit: int = 20):
+    """Get a wallet's home timeline: its own snippets and those of accounts it follows."""
     try:
-        # Get recent snippets from all users
+        limit = min(max(1, limit), FEED_MAX_PAGE_SIZE)
+        after_cursor = keyset_filter("timestamp", cursor)
+        
+        # Pushed entries: one indexed range read
+        entries = await db.home_timelines.find(
+            {"owner_address": wallet_address, **after_cursor}
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+        positions = {entry["snippet_id"]: (entry["timestamp"], entry["_id"]) for entry in entries}
+        pulled_snippets = {}
+        
+        # Celebrity followees were not fanned out; pull their recent snippets now
+        celebrities = await get_celebrity_wallets()
+        if celebrities:
+            followed = await db.user_follows.find(
+                {"follower_address": wallet_address, "following_address": {"$in": celebrities}},
+                {"following_address": 1}
+            ).to_list(None)
+            if followed:
+                pulled = await db.snippet_metadata.find({
+                    "wallet_address": {"$in": [follow["following_address"] for follow in followed]},
+                    "is_public": True,
+                    **after_cursor
+                }).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+                for snippet in pulled:
+                    if snippet["irys_id"] not in positions:
+                        positions[snippet["irys_id"]] = (snippet["timestamp"], snippet["_id"])
+                        pulled_snippets[snippet["irys_id"]] = snippet
+        
+        # Page over the merged candidates, before dropping entries whose snippet
+        # is gone or private, so a filtered page never ends pagination early
+        page_ids = sorted(positions, key=positions.get, reverse=True)
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+        pushed_ids = [snippet_id for snippet_id in page_ids if snippet_id not in pulled_snippets]
         snippets = await db.snippet_metadata.find(
-            {"is_public": True}
-        ).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
+            {"irys_id": {"$in": pushed_ids}, "is_public": True}
+        ).to_list(None) if pushed_ids else []
+        snippets += [pulled_snippets[snippet_id] for snippet_id in page_ids if snippet_id in pulled_snippets]
+        snippets.sort(key=lambda snippet: positions[snippet["irys_id"]], reverse=True)
         
-        feed_items = []
-        for snippet in snippets:
-            snippet["_id"] = str(snippet["_id"])
-            
-            # Get user profile
-            user_profile = await db.user_profiles.find_one({"wallet_address": snippet["wallet_address"]})
-            
-            # Get social stats
-            likes_count = await db.snippet_likes.count_documents({"snippet_id": snippet["irys_id"]})
-            comments_count = await db.snippet_comments.count_documents({"snippet_id": snippet["irys_id"]})
-            
-            feed_item = PublicSnippet(
-                id=snippet["id"],
-                irys_id=snippet["irys_id"],
-                wallet_address=snippet["wallet_address"],
-                username=user_profile.get("username") if user_profile else None,
-                url=snippet.get("url"),  # Optional for non-web content
-                title=snippet["title"],
-                summary=snippet["summary"],
-                tags=snippet["tags"],
-                network=snippet["network"],
-                content_type=snippet.get("content_type", "web_snippet"),
-                mood=snippet.get("mood"),
-                theme=snippet.get("theme"),
-                created_at=snippet["timestamp"],
-                likes_count=likes_count,
-                comments_count=comments_count
-            )
-            feed_items.append(feed_item.dict())
+        feed_items = await build_feed_items(snippets)
+        next_cursor = encode_cursor(*positions[page_ids[-1]]) if has_more else None
         
-        return {"feed": feed_items, "has_more": len(feed_items) == limit}
+        page = {"feed": feed_items, "has_more": has_more, "next_cursor": next_cursor}
+        return await personalize_feed_page(page, wallet_address)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching feed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching home feed: {str(e)}")
+
+# Trending
+# A snippet's score is the sum of its post, like and comment weights, each decayed
+# exponentially by its age. Contributions are stored relative to a shared epoch,
+# w * exp(rate * (t_event - epoch)), so every snippet's score shrinks by the same
+# factor over time and ranking never needs rescoring: likes and comments simply
+# $inc the score. A periodic re-decay rebases all scores onto a newer epoch in one
+# bulk update to keep the numbers small.
+trending_state = {"epoch": None, "loaded_at": None}
+trending_redecay_task = None
+
+async def get_trending_epoch() -> datetime:
+    """The epoch scores are currently expressed against, shared through Mongo.
+    
+    Once a re-decay is due the epoch is reloaded every few moments rather than
+    every minute, so a rebase by another process is picked up promptly. Buffered
+    score increments computed against the old epoch are rescaled to the new one.
+    """
+    loaded_at = trending_state["loaded_at"]
+    epoch = trending_state["epoch"]
+    reload_after = TRENDING_EPOCH_RELOAD_SECONDS
+    if epoch is not None and (datetime.utcnow() - epoch).total_seconds() >= TRENDING_REDECAY_INTERVAL_SECONDS:
+        reload_after = TRENDING_OVERDUE_RELOAD_SECONDS
+    if loaded_at is None or time.monotonic() - loaded_at > reload_after:
+        state = await db.trending_state.find_one_and_update(
+            {"_id": "decay"},
+            {"$setOnInsert": {"epoch": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if epoch is not None and state["epoch"] != epoch:
+            factor = math.exp(-TRENDING_DECAY_RATE * (state["epoch"] - epoch).total_seconds())
+            counter_buffer.rescale("snippet_metadata", "trending_score", factor)
+        trending_state["epoch"] = state["epoch"]
+        trending_state["loaded_at"] = time.monotonic()
+    return trending_state["epoch"]
+
+async def trending_contribution(weight: float, at: datetime) -> float:
+    """Score contribution of an event with the given weight that happened at `at`."""
+    epoch = await get_trending_epoch()
+    return weight * math.exp(TRENDING_DECAY_RATE * (at - epoch).total_seconds())
+
+async def redecay_trending_scores() -> bool:
+    """Rebase every trending score onto the current time as the new epoch.
+    
+    The epoch swap is claimed atomically so only one process applies the decay.
+    """
+    await counter_buffer.flush()  # Buffered score increments are relative to the old epoch
+    old_epoch = await get_trending_epoch()
+    new_epoch = datetime.utcnow()
+    claimed = await db.trending_state.find_one_and_update(
+        {"_id": "decay", "epoch": old_epoch},
+        {"$set": {"epoch": new_epoch}}
+    )
+    if not claimed:
+        trending_state["loaded_at"] = None  # Another process rebased; reload its epoch
+        return False
+    
+    factor = math.exp(-TRENDING_DECAY_RATE * (new_epoch - old_epoch).total_seconds())
+    await db.snippet_metadata.update_many(
+        {"trending_score": {"$gt": 0}},
+        [{"$set": {"trending_score": {"$multiply": ["$trending_score", factor]}}}]
+    )
+    counter_buffer.rescale("snippet_metadata", "trending_score", factor)  # Buffered since the flush
+    trending_state.update(epoch=new_epoch, loaded_at=time.monotonic())
+    return True
+
+async def trending_redecay_worker():
+    """Periodically rebase trending scores."""
+    while True:
+        try:
+            epoch = await get_trending_epoch()
+            due_in = TRENDING_REDECAY_INTERVAL_SECONDS - (datetime.utcnow() - epoch).total_seconds()
+            if due_in <= 0:
+                if await redecay_trending_scores():
+                    print("✅ Re-decayed trending scores")
+                due_in = TRENDING_REDECAY_INTERVAL_SECONDS
+            await asyncio.sleep(min(due_in, TRENDING_REDECAY_INTERVAL_SECONDS))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Trending re-decay failed: {e}")
+            await asyncio.sleep(60)
+
+async def rebuild_trending_scores() -> int:
+    """Recompute every trending score from snippets, likes and comments. Returns the number updated."""
+    await counter_buffer.flush()
+    epoch = await get_trending_epoch()
+    
+    def decayed_sum(at, weight: float) -> dict:
+        age_seconds = {"$divide": [{"$subtract": [at, epoch]}, 1000]}
+        return {"$sum": {"$multiply": [weight, {"$exp": {"$multiply": [TRENDING_DECAY_RATE, age_seconds]}}]}}
+    
+    async def scores(collection, at, weight):
+        return {
+            row["_id"]: row["score"]
+            async for row in collection.aggregate([
+                {"$match": {"active": {"$ne": False}}},
+                {"$group": {"_id": "$snippet_id", "score": decayed_sum(at, weight)}}
+            ])
+        }
+    
+    like_scores, comment_scores = await asyncio.gather(
+        scores(db.snippet_likes, {"$ifNull": ["$liked_at", "$created_at"]}, TRENDING_LIKE_WEIGHT),
+        scores(db.snippet_comments, "$created_at", TRENDING_COMMENT_WEIGHT)
+    )
+    
+    updated = 0
+    operations = []
+    async for snippet in db.snippet_metadata.find({}, {"irys_id": 1, "timestamp": 1}):
+        score = TRENDING_POST_WEIGHT * math.exp(TRENDING_DECAY_RATE * (snippet["timestamp"] - epoch).total_seconds())
+        score += like_scores.get(snippet["irys_id"], 0) + comment_scores.get(snippet["irys_id"], 0)
+        operations.append(UpdateOne({"_id": snippet["_id"]}, {"$set": {"trending_score": score}}))
+        if len(operations) >= 1000:
+            updated += (await db.snippet_metadata.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await db.snippet_metadata.bulk_write(operations, ordered=False)).modified_count
+    return updated
+
+@api_router.get("/feed/trending")
+async def get_trending_feed(limit: int = 20, skip: int = 0, viewer: Optional[str] = None):
+    """Get public snippets ranked by time-decayed likes and comments."""
+    try:
+        limit = min(max(1, limit), FEED_MAX_PAGE_SIZE)
+        snippets = await db.snippet_metadata.find(
+            {"is_public": True}
+        ).sort("trending_score", -1).skip(skip).limit(limit + 1).to_list(limit + 1)
+        
+        has_more = len(snippets) > limit
+        snippets = snippets[:limit]
+        page = {"feed": await build_feed_items(snippets), "has_more": has_more}
+        return await personalize_feed_page(page, viewer)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching trending feed: {str(e)}")
+
+# Live updates
+class EventBroker:
+    """In-process pub/sub for live feed updates.
+    
+    Each subscriber gets a bounded queue; one that falls behind loses its oldest
+    events instead of slowing down publishers. When the API runs as several
+    workers this can be swapped for a shared broker (e.g. Redis pub/sub) exposing
+    the same subscribe/unsubscribe/publish interface.
+    """
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.dropped = 0
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+    
+    async def publish(self, event: str, data: dict):
+        message = {"event": event, "data": data}
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+    
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers), "dropped": self.dropped}
+
+event_broker = EventBroker(EVENT_SUBSCRIBER_QUEUE_SIZE)
+
+async def publish_event(event: str, data: dict):
+    """Publish a live update; delivery is best effort and never fails the request."""
+    try:
+        await event_broker.publish(event, data)
+    except Exception as e:
+        print(f"⚠️ Could not publish {event} event: {e}")
+
+@api_router.get("/events")
+async def stream_events(request: Request):
+    """Server-sent event stream of new snippets, like counts and new comments."""
+    async def event_stream():
+        queue = event_broker.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(jsonable_encoder(message['data']))}\n\n"
+        finally:
+            event_broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/events/stats")
+async def get_event_stats():
+    """Live update subscriber counts."""
+    return event_broker.stats()
 
 @api_router.get("/users/discover")
 async def discover_users(skip: int = 0, limit: int = 20):
@@ -820,98 +2661,208 @@ async def discover_users(skip: int = 0, limit: int = 20):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error discovering users: {str(e)}")
 
+def is_duplicate_key_error(error: Exception) -> bool:
+    """Whether a write failed only on unique indexes."""
+    if isinstance(error, DuplicateKeyError):
+        return True
+    if isinstance(error, BulkWriteError):
+        errors = error.details.get("writeErrors", [])
+        return bool(errors) and all(item.get("code") == 11000 for item in errors)
+    return False
+
+async def run_follow_writes(writes):
+    """Run `writes(session)`, inside a transaction when FOLLOW_USE_TRANSACTIONS is set.
+    
+    Outside a transaction `writes` absorbs duplicate-key errors itself. Inside one
+    with_transaction retries transient errors such as write conflicts; a duplicate
+    key means a concurrent request committed the same edge and aborted this
+    transaction, so it is run once more and finds the committed edge.
+    """
+    if not FOLLOW_USE_TRANSACTIONS:
+        return await writes(None)
+    async with await client.start_session() as session:
+        try:
+            return await session.with_transaction(writes)
+        except (DuplicateKeyError, BulkWriteError) as e:
+            if not is_duplicate_key_error(e):
+                raise
+            return await session.with_transaction(writes)
+
+async def apply_follow_counts(follower_address: str, following_addresses: List[str], delta: int, session=None):
+    """Adjust both sides' follow counters.
+    
+    Counters go through the write-behind buffer, except inside a transaction
+    where they are written in one bulk write alongside the edge.
+    """
+    if not following_addresses:
+        return
+    if session is None:
+        await counter_buffer.increment(
+            "user_profiles", "wallet_address", follower_address,
+            {"following_count": delta * len(following_addresses)}
+        )
+        for address in following_addresses:
+            await counter_buffer.increment("user_profiles", "wallet_address", address, {"followers_count": delta})
+        return
+    operations = [UpdateOne(
+        {"wallet_address": follower_address},
+        {"$inc": {"following_count": delta * len(following_addresses)}}
+    )]
+    operations += [
+        UpdateOne({"wallet_address": address}, {"$inc": {"followers_count": delta}})
+        for address in following_addresses
+    ]
+    await db.user_profiles.bulk_write(operations, ordered=False, session=session)
+
+def follow_edge_upsert(follower_address: str, following_address: str):
+    """Query and update for an idempotent follow edge insert.
+    
+    Used with upsert=True and backed by the unique (follower, following) index.
+    """
+    return (
+        {"follower_address": follower_address, "following_address": following_address},
+        {"$setOnInsert": {"id": str(uuid.uuid4()), "created_at": datetime.utcnow()}}
+    )
+
 @api_router.post("/social/follow")
 async def follow_user(request: FollowRequest):
     """Follow another user."""
     try:
-        # Check if already following
-        existing = await db.user_follows.find_one({
-            "follower_address": request.follower_address,
-            "following_address": request.following_address
-        })
+        async def writes(session):
+            query, update = follow_edge_upsert(request.follower_address, request.following_address)
+            try:
+                result = await db.user_follows.update_one(query, update, upsert=True, session=session)
+            except DuplicateKeyError:
+                if session is not None:
+                    raise  # The transaction is aborted; run_follow_writes retries it
+                # A concurrent request created the same edge first
+                return False
+            if result.upserted_id is None:
+                return False
+            await apply_follow_counts(request.follower_address, [request.following_address], 1, session)
+            return True
         
-        if existing:
+        if not await run_follow_writes(writes):
             return {"message": "Already following this user"}
-        
-        # Create follow relationship
-        follow_data = {
-            "id": str(uuid.uuid4()),
-            "follower_address": request.follower_address,
-            "following_address": request.following_address,
-            "created_at": datetime.utcnow()
-        }
-        await db.user_follows.insert_one(follow_data)
-        
-        # Update follow counts
-        await db.user_profiles.update_one(
-            {"wallet_address": request.follower_address},
-            {"$inc": {"following_count": 1}}
-        )
-        await db.user_profiles.update_one(
-            {"wallet_address": request.following_address},
-            {"$inc": {"followers_count": 1}}
-        )
-        
+        await backfill_timeline(request.follower_address, [request.following_address])
         return {"message": "Successfully followed user"}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error following user: {str(e)}")
 
+@api_router.post("/social/follow/batch")
+async def follow_users_batch(request: FollowBatchRequest):
+    """Follow many users at once, e.g. from onboarding suggestions."""
+    try:
+        following_addresses = list(dict.fromkeys(
+            address for address in request.following_addresses if address != request.follower_address
+        ))
+        if len(following_addresses) > FOLLOW_BATCH_MAX:
+            raise HTTPException(status_code=400, detail=f"At most {FOLLOW_BATCH_MAX} users can be followed at once")
+        if not following_addresses:
+            return {"followed": [], "already_following": []}
+        
+        async def writes(session):
+            operations = [
+                UpdateOne(*follow_edge_upsert(request.follower_address, address), upsert=True)
+                for address in following_addresses
+            ]
+            try:
+                result = await db.user_follows.bulk_write(operations, ordered=False, session=session)
+                upserted = result.upserted_ids
+            except BulkWriteError as e:
+                # Edges created concurrently fail on the unique index; the rest still applied.
+                # Inside a transaction the whole batch aborted and run_follow_writes retries it.
+                if session is not None or not is_duplicate_key_error(e):
+                    raise
+                upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+            followed = [following_addresses[index] for index in sorted(upserted)]
+            await apply_follow_counts(request.follower_address, followed, 1, session)
+            return followed
+        
+        followed = await run_follow_writes(writes)
+        await backfill_timeline(request.follower_address, followed)
+        return {
+            "followed": followed,
+            "already_following": [address for address in following_addresses if address not in followed]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error following users: {str(e)}")
+
 @api_router.delete("/social/unfollow/{follower_address}/{following_address}")
 async def unfollow_user(follower_address: str, following_address: str):
     """Unfollow a user."""
     try:
-        # Remove follow relationship
-        result = await db.user_follows.delete_one({
-            "follower_address": follower_address,
-            "following_address": following_address
-        })
+        async def writes(session):
+            result = await db.user_follows.delete_one({
+                "follower_address": follower_address,
+                "following_address": following_address
+            }, session=session)
+            if result.deleted_count == 0:
+                return False
+            # Pushed timeline entries from the unfollowed account must not keep showing up
+            await db.home_timelines.delete_many({
+                "owner_address": follower_address,
+                "author_address": following_address
+            }, session=session)
+            await apply_follow_counts(follower_address, [following_address], -1, session)
+            return True
         
-        if result.deleted_count > 0:
-            # Update follow counts
-            await db.user_profiles.update_one(
-                {"wallet_address": follower_address},
-                {"$inc": {"following_count": -1}}
-            )
-            await db.user_profiles.update_one(
-                {"wallet_address": following_address},
-                {"$inc": {"followers_count": -1}}
-            )
+        if await run_follow_writes(writes):
             return {"message": "Successfully unfollowed user"}
-        else:
-            return {"message": "Follow relationship not found"}
+        return {"message": "Follow relationship not found"}
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error unfollowing user: {str(e)}")
 
 @api_router.post("/social/like")
 async def like_snippet(request: LikeRequest):
-    """Like a snippet."""
+    """Like a snippet, or unlike it if the user already liked it.
+    
+    The toggle is a single upsert on the unique (user_address, snippet_id) index.
+    Unlikes flip an `active` flag instead of deleting, so concurrent clicks
+    serialize on one document and can never leave duplicate likes behind.
+    Documents written before the flag existed count as active.
+    """
     try:
-        # Check if already liked
-        existing = await db.snippet_likes.find_one({
+        now = datetime.utcnow()
+        was_active = {"$ifNull": ["$active", {"$gt": [{"$ifNull": ["$created_at", None]}, None]}]}
+        previous = await db.snippet_likes.find_one_and_update(
+            {"user_address": request.user_address, "snippet_id": request.snippet_id},
+            [
+                {"$set": {
+                    "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+                    "created_at": {"$ifNull": ["$created_at", now]},
+                    "active": {"$eq": [was_active, False]}
+                }},
+                {"$set": {"liked_at": {"$cond": ["$active", now, "$liked_at"]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        liked = not (previous and previous.get("active", True))
+        
+        if liked:
+            score = await trending_contribution(TRENDING_LIKE_WEIGHT, now)
+            change = {"likes_count": 1, "trending_score": score}
+        else:
+            # Take back exactly what the like contributed to the trending score
+            score = await trending_contribution(TRENDING_LIKE_WEIGHT, previous.get("liked_at") or previous["created_at"])
+            change = {"likes_count": -1, "trending_score": -score}
+        await counter_buffer.increment("snippet_metadata", "irys_id", request.snippet_id, change)
+        feed_cache.invalidate()
+        
+        # Subscribers apply the change to the count they hold; no read-back needed
+        await publish_event("snippet.likes", {
+            "snippet_id": request.snippet_id,
             "user_address": request.user_address,
-            "snippet_id": request.snippet_id
+            "delta": change["likes_count"]
         })
+        return {"message": "Snippet liked" if liked else "Snippet unliked", "liked": liked}
         
-        if existing:
-            # Unlike
-            await db.snippet_likes.delete_one({
-                "user_address": request.user_address,
-                "snippet_id": request.snippet_id
-            })
-            return {"message": "Snippet unliked", "liked": False}
-        else:
-            # Like
-            like_data = {
-                "id": str(uuid.uuid4()),
-                "user_address": request.user_address,
-                "snippet_id": request.snippet_id,
-                "created_at": datetime.utcnow()
-            }
-            await db.snippet_likes.insert_one(like_data)
-            return {"message": "Snippet liked", "liked": True}
-            
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error liking snippet: {str(e)}")
 
@@ -925,40 +2876,187 @@ async def add_comment(request: CommentRequest):
             content=request.content
         )
         await db.snippet_comments.insert_one(comment.dict())
+        score = await trending_contribution(TRENDING_COMMENT_WEIGHT, comment.created_at)
+        await counter_buffer.increment(
+            "snippet_metadata", "irys_id", request.snippet_id,
+            {"comments_count": 1, "trending_score": score}
+        )
+        feed_cache.invalidate()
+        
+        await publish_event("comment.created", {
+            "comment": {**comment.dict(), "username": await profile_cache.username(request.user_address)},
+            "comments_delta": 1
+        })
         return comment
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding comment: {str(e)}")
 
 @api_router.get("/social/comments/{snippet_id}")
-async def get_comments(snippet_id: str):
-    """Get comments for a snippet."""
+async def get_comments(snippet_id: str, cursor: Optional[str] = None, limit: int = COMMENTS_PAGE_SIZE):
+    """Get a page of comments for a snippet, newest first.
+    
+    Pass the returned next_cursor back as `cursor` for the following page.
+    """
     try:
-        comments = await db.snippet_comments.find({"snippet_id": snippet_id}).sort("created_at", -1).to_list(100)
+        limit = min(max(1, limit), COMMENTS_MAX_PAGE_SIZE)
+        comments = await db.snippet_comments.find(
+            {"snippet_id": snippet_id, **keyset_filter("created_at", cursor)}
+        ).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+        
+        has_more = len(comments) > limit
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1]["created_at"], comments[-1]["_id"]) if has_more else None
         
         # Enrich with user data
+        profiles = await profile_cache.get_many(comment["user_address"] for comment in comments)
         for comment in comments:
             comment["_id"] = str(comment["_id"])
-            user_profile = await db.user_profiles.find_one({"wallet_address": comment["user_address"]})
-            comment["username"] = user_profile.get("username") if user_profile else None
+            profile = profiles[comment["user_address"]]
+            comment["username"] = profile.get("username") if profile else None
         
-        return {"comments": comments}
+        return {"comments": comments, "next_cursor": next_cursor, "has_more": has_more}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching comments: {str(e)}")
 
+@api_router.get("/snippets/detail/{irys_id}")
+async def get_snippet_detail(irys_id: str, viewer: Optional[str] = None, comments_limit: int = COMMENTS_PAGE_SIZE):
+    """Get a snippet with its author, counts, the viewer's like state and the first page of comments.
+    
+    Everything is assembled in a single aggregation so opening a snippet costs one round trip.
+    """
+    try:
+        comments_limit = min(max(1, comments_limit), COMMENTS_MAX_PAGE_SIZE)
+        pipeline = [
+            {"$match": {"irys_id": irys_id}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "user_profiles",
+                "let": {"wallet": "$wallet_address"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$wallet_address", "$$wallet"]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 0}}
+                ],
+                "as": "author"
+            }},
+            {"$lookup": {
+                "from": "snippet_comments",
+                "let": {"snippet_id": "$irys_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$snippet_id", "$$snippet_id"]}}},
+                    {"$sort": {"created_at": -1, "_id": -1}},
+                    {"$limit": comments_limit + 1},
+                    {"$lookup": {
+                        "from": "user_profiles",
+                        "let": {"wallet": "$user_address"},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$wallet_address", "$$wallet"]}}},
+                            {"$limit": 1},
+                            {"$project": {"_id": 0, "username": 1}}
+                        ],
+                        "as": "profile"
+                    }}
+                ],
+                "as": "comments"
+            }}
+        ]
+        if viewer:
+            pipeline.append({"$lookup": {
+                "from": "snippet_likes",
+                "let": {"snippet_id": "$irys_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$snippet_id", "$$snippet_id"]},
+                        {"$eq": ["$user_address", viewer]},
+                        {"$ne": ["$active", False]}
+                    ]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "viewer_like"
+            }})
+        
+        results = await db.snippet_metadata.aggregate(pipeline).to_list(1)
+        if not results:
+            raise HTTPException(status_code=404, detail="Snippet not found")
+        snippet = results[0]
+        if not snippet.get("is_public", True) and viewer != snippet["wallet_address"]:
+            raise HTTPException(status_code=404, detail="Snippet not found")
+        
+        author = snippet["author"][0] if snippet["author"] else None
+        item = PublicSnippet(
+            id=snippet["id"],
+            irys_id=snippet["irys_id"],
+            wallet_address=snippet["wallet_address"],
+            username=author.get("username") if author else None,
+            url=snippet.get("url"),
+            title=snippet["title"],
+            summary=snippet["summary"],
+            tags=snippet["tags"],
+            network=snippet["network"],
+            content_type=snippet.get("content_type", "web_snippet"),
+            mood=snippet.get("mood"),
+            theme=snippet.get("theme"),
+            created_at=snippet["timestamp"],
+            # Include increments still waiting in the write-behind buffer
+            likes_count=snippet.get("likes_count", 0) + counter_buffer.pending_delta(
+                "snippet_metadata", "irys_id", irys_id, "likes_count"
+            ),
+            comments_count=snippet.get("comments_count", 0) + counter_buffer.pending_delta(
+                "snippet_metadata", "irys_id", irys_id, "comments_count"
+            ),
+            is_liked=bool(snippet.get("viewer_like"))
+        )
+        
+        comments = snippet["comments"]
+        has_more = len(comments) > comments_limit
+        comments = comments[:comments_limit]
+        next_cursor = encode_cursor(comments[-1]["created_at"], comments[-1]["_id"]) if has_more else None
+        for comment in comments:
+            profile = comment.pop("profile")
+            comment["_id"] = str(comment["_id"])
+            comment["username"] = profile[0].get("username") if profile else None
+        
+        return {
+            "snippet": item.dict(),
+            "author": author,
+            "comments": comments,
+            "comments_next_cursor": next_cursor,
+            "comments_has_more": has_more
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching snippet detail: {str(e)}")
+
 @api_router.post("/save-snippet-metadata", response_model=SnippetMetadata)
 async def save_snippet_metadata(request: SnippetMetadataCreate):
     """Save snippet metadata to database with social features."""
     try:
         metadata = SnippetMetadata(**request.dict())
+        metadata.trending_score = await trending_contribution(TRENDING_POST_WEIGHT, metadata.timestamp)
+        
+        # The upload may have landed before the metadata arrived; store the real id
+        if metadata.irys_id.startswith("pending_"):
+            entry = await db.irys_upload_outbox.find_one({"id": metadata.irys_id, "status": "done"})
+            if entry:
+                metadata.irys_id = entry["irys_id"]
+        
         await db.snippet_metadata.insert_one(metadata.dict())
+        feed_cache.invalidate()
+        if metadata.is_public:
+            await enqueue_fanout(metadata.dict())
+            feed_items = await build_feed_items([metadata.dict()])
+            await publish_event("snippet.created", feed_items[0])
         
         # Update user's snippet count
-        await db.user_profiles.update_one(
-            {"wallet_address": request.wallet_address},
-            {"$inc": {"snippets_count": 1}},
-            upsert=True
+        await counter_buffer.increment(
+            "user_profiles", "wallet_address", request.wallet_address, {"snippets_count": 1}, upsert=True
         )
         
         return metadata
@@ -978,19 +3076,123 @@ async def get_user_snippets(wallet_address: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching snippets: {str(e)}")
 
+async def reconcile_snippet_counters() -> int:
+    """Rebuild likes_count and comments_count on snippet_metadata from the source collections.
+    
+    Counts come from one $group aggregation per collection; only snippets whose
+    stored counters drifted are rewritten, in bulk. Returns the number fixed.
+    """
+    await counter_buffer.flush()
+    
+    async def counts(collection):
+        return {
+            row["_id"]: row["count"]
+            async for row in collection.aggregate([
+                {"$match": {"active": {"$ne": False}}},  # Unliked likes are kept inactive
+                {"$group": {"_id": "$snippet_id", "count": {"$sum": 1}}}
+            ])
+        }
+    
+    likes_counts, comments_counts = await asyncio.gather(
+        counts(db.snippet_likes), counts(db.snippet_comments)
+    )
+    
+    fixed = 0
+    operations = []
+    async for snippet in db.snippet_metadata.find({}, {"irys_id": 1, "likes_count": 1, "comments_count": 1}):
+        expected = {
+            "likes_count": likes_counts.get(snippet["irys_id"], 0),
+            "comments_count": comments_counts.get(snippet["irys_id"], 0)
+        }
+        if any(snippet.get(field) != value for field, value in expected.items()):
+            operations.append(UpdateOne({"_id": snippet["_id"]}, {"$set": expected}))
+        if len(operations) >= 1000:
+            fixed += (await db.snippet_metadata.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        fixed += (await db.snippet_metadata.bulk_write(operations, ordered=False)).modified_count
+    return fixed
+
+async def dedupe_unique_keys() -> dict:
+    """Collapse documents that would block a unique index in INDEX_REGISTRY.
+    
+    For every unique key the first document is kept and the rest are deleted:
+    active likes win over unliked ones, then the oldest document wins. Returns
+    collection -> number of documents removed; run reconcile_snippet_counters
+    afterwards since removed likes may still be counted.
+    """
+    removed = {}
+    for collection, indexes in INDEX_REGISTRY.items():
+        for keys, options in indexes:
+            if not options.get("unique"):
+                continue
+            groups = db[collection].aggregate([
+                {"$addFields": {"_dedupe_rank": {"$cond": [{"$eq": ["$active", False]}, 1, 0]}}},
+                {"$sort": {"_dedupe_rank": 1, "created_at": 1, "_id": 1}},
+                {"$group": {
+                    "_id": {field: f"${field}" for field, _ in keys},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1}
+                }},
+                {"$match": {"count": {"$gt": 1}}}
+            ], allowDiskUse=True)
+            
+            duplicates = []
+            async for group in groups:
+                duplicates.extend(group["ids"][1:])
+            for start in range(0, len(duplicates), 1000):
+                result = await db[collection].delete_many({"_id": {"$in": duplicates[start:start + 1000]}})
+                removed[collection] = removed.get(collection, 0) + result.deleted_count
+    return removed
+
 # Include the router in the main app
 app.include_router(api_router)
 
 # Health check endpoint for Vercel testing
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint for Vercel deployment testing"""
+    """Liveness check: the process is up and serving requests."""
     return {
         "status": "healthy",
         "message": "Irys Snippet Vault API is running",
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness check covering the Irys sidecar, MongoDB and Claude configuration."""
+    # Serverless runtimes skip startup hooks, so the first probe kicks off the warm-up
+    ensure_irys_warmup()
+    
+    checks = {
+        "irys": {
+            "ok": irys_status["state"] in ("ready", "mock"),
+            "state": irys_status["state"],
+            "error": irys_status["error"],
+            "checked_at": irys_status["checked_at"].isoformat() if irys_status["checked_at"] else None
+        }
+    }
+    
+    try:
+        await asyncio.wait_for(client.admin.command('ping'), timeout=2)
+        checks["mongo"] = {"ok": True}
+    except Exception as e:
+        checks["mongo"] = {"ok": False, "error": str(e) or "ping timed out"}
+    
+    checks["claude"] = {"ok": bool(os.environ.get('CLAUDE_API_KEY'))}
+    if not checks["claude"]["ok"]:
+        checks["claude"]["error"] = "Claude API key not configured"
+    
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
+
 @app.get("/api/test")
 async def test_endpoint():
     """Test endpoint for Vercel deployment verification"""
@@ -1014,17 +3216,45 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
+    global fanout_task, balance_refresher_task, trending_redecay_task, index_bootstrap_task
     print("🚀 Starting Irys Snippet Vault API with Social Features...")
     
-    # Initialize Irys service
-    irys_ready = await init_irys_service()
-    if irys_ready:
-        print("✅ Irys blockchain integration ready!")
-    else:
-        print("⚠️ Irys service initialization failed - some features may not work")
+    # Create indexes in the background; an unreachable Mongo must not hold up serving
+    index_bootstrap_task = asyncio.create_task(bootstrap_indexes())
+    
+    # Start background upload workers
+    start_outbox_workers()
+    
+    # Start flushing buffered counter increments
+    counter_buffer.start()
+    
+    # Start the home timeline fan-out worker
+    fanout_task = asyncio.create_task(fanout_worker())
+    
+    # Keep trending scores rebased
+    trending_redecay_task = asyncio.create_task(trending_redecay_worker())
+    
+    # Warm up Irys in the background so the API accepts traffic immediately
+    ensure_irys_warmup()
+    
+    # Keep the Irys balance cache warm
+    balance_refresher_task = asyncio.create_task(balance_refresher())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if irys_warmup_task and not irys_warmup_task.done():
+        irys_warmup_task.cancel()
+    if balance_refresher_task:
+        balance_refresher_task.cancel()
+    if fanout_task:
+        fanout_task.cancel()
+    if trending_redecay_task:
+        trending_redecay_task.cancel()
+    if index_bootstrap_task and not index_bootstrap_task.done():
+        index_bootstrap_task.cancel()
+    await stop_outbox_workers()
+    await counter_buffer.stop()  # Write out buffered increments before closing the client
+    await close_gateway_session()
     client.close()
 
 # For Vercel deployment, we don't need to serve static files
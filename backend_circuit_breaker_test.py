@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Gateway circuit breaker tests
+
+Exercises CircuitBreaker through its closed, open and half-open states: the
+circuit opens after repeated failures, lets exactly one probe through once the
+cool-down passes, and closes or reopens on the probe's outcome. A probe cut off
+by the query deadline must not leave the circuit stuck half-open. Needs no
+server, database or network.
+
+Usage: python backend_circuit_breaker_test.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import server  # noqa: E402
+
+
+class HangingResponse:
+    """Context manager for a gateway request that never answers."""
+
+    async def __aenter__(self):
+        await asyncio.Event().wait()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class HangingSession:
+    def get(self, url):
+        return HangingResponse()
+
+
+class CircuitBreakerTests:
+    """Checks state transitions and half-open probing of CircuitBreaker."""
+
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def check(self, name, condition, detail=""):
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return condition
+
+    @staticmethod
+    def opened_breaker(reset_seconds=0.0):
+        breaker = server.CircuitBreaker(failure_threshold=3, reset_seconds=reset_seconds)
+        for _ in range(3):
+            breaker.record_failure()
+        return breaker
+
+    def test_opens_after_threshold(self):
+        breaker = server.CircuitBreaker(failure_threshold=3, reset_seconds=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.check("Circuit stays closed below the threshold", breaker.state == "closed" and breaker.allow())
+        breaker.record_failure()
+        self.check("Circuit opens at the threshold and rejects calls",
+                   breaker.state == "open" and not breaker.allow(), f"(state={breaker.state})")
+
+    def test_half_open_allows_one_probe(self):
+        breaker = self.opened_breaker()
+        allowed = [breaker.allow() for _ in range(3)]
+        self.check("Half-open circuit lets exactly one probe through",
+                   breaker.state == "half_open" and allowed == [True, False, False], f"(allowed={allowed})")
+
+    def test_probe_outcome(self):
+        breaker = self.opened_breaker()
+        breaker.allow()
+        breaker.record_success()
+        self.check("A successful probe closes the circuit",
+                   breaker.state == "closed" and breaker.failures == 0 and breaker.allow())
+
+        breaker = self.opened_breaker(reset_seconds=60)
+        breaker.opened_at -= 60
+        breaker.allow()
+        breaker.record_failure()
+        self.check("A failed probe reopens the circuit for another cool-down",
+                   breaker.state == "open" and not breaker.allow(), f"(state={breaker.state})")
+
+    def test_abandoned_probe(self):
+        breaker = self.opened_breaker()
+        breaker.allow()
+        breaker.record_abandoned()
+        self.check("An abandoned probe lets the next call probe",
+                   breaker.state == "half_open" and breaker.allow() and not breaker.allow())
+
+    async def test_cancelled_fetch_releases_probe(self):
+        breaker = self.opened_breaker()
+        server.gateway_breakers["gateway.irys.xyz"] = breaker
+        original_session = server.get_gateway_session
+        server.get_gateway_session = lambda: HangingSession()
+        try:
+            fetch = asyncio.create_task(server.fetch_gateway_snippet("probe-deadline-test", asyncio.Semaphore(1)))
+            await asyncio.sleep(0.05)
+            self.check("The fetch is the half-open probe", breaker.probe_in_flight)
+
+            fetch.cancel()
+            await asyncio.gather(fetch, return_exceptions=True)
+            self.check("Cancelling the probe at the deadline frees the circuit for a new probe",
+                       breaker.state == "half_open" and breaker.allow())
+        finally:
+            server.get_gateway_session = original_session
+            server.gateway_breakers.pop("gateway.irys.xyz", None)
+
+    async def run_all(self):
+        self.test_opens_after_threshold()
+        self.test_half_open_allows_one_probe()
+        self.test_probe_outcome()
+        self.test_abandoned_probe()
+        await self.test_cancelled_fetch_releases_probe()
+
+    def run_circuit_breaker_tests(self):
+        print("🧪 Starting Circuit Breaker Tests")
+
+        asyncio.run(self.run_all())
+
+        print(f"\n📊 Circuit Breaker Tests: {self.tests_passed}/{self.tests_run} passed")
+        return self.tests_passed == self.tests_run
+
+
+def main():
+    tester = CircuitBreakerTests()
+    success = tester.run_circuit_breaker_tests()
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Counter write-behind buffer tests
+
+Exercises CounterBuffer against an in-memory stand-in for the database that
+can be told to fail: increments to one document coalesce into a single $inc,
+a flush that fails keeps its increments for the next interval, and a partially
+failed bulk write retries only the writes that did not land. Needs no server
+or database.
+
+Usage: python backend_counter_buffer_test.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import server  # noqa: E402
+
+
+class FakeCollection:
+    """Records writes; raises the queued errors first, one per bulk_write."""
+
+    def __init__(self):
+        self.bulk_writes = []
+        self.updates = []
+        self.errors = []
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.bulk_writes.append(list(operations))
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update, upsert))
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+class CounterBufferTests:
+    """Checks coalescing, write-through and flush retries of CounterBuffer."""
+
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def check(self, name, condition, detail=""):
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return condition
+
+    @staticmethod
+    def fresh_buffer():
+        server.db = FakeDatabase()
+        buffer = server.CounterBuffer(flush_interval=60, max_keys=100)
+        buffer.task = asyncio.get_running_loop().create_future()  # Looks running; never flushes on its own
+        return buffer
+
+    async def test_increments_coalesce(self):
+        buffer = self.fresh_buffer()
+        for _ in range(5):
+            await buffer.increment("user_profiles", "wallet_address", "0xA", {"followers_count": 1})
+        await buffer.increment("user_profiles", "wallet_address", "0xA", {"followers_count": -1, "following_count": 2})
+        await buffer.flush()
+
+        writes = server.db["user_profiles"].bulk_writes
+        expected = [[UpdateOne({"wallet_address": "0xA"}, {"$inc": {"followers_count": 4, "following_count": 2}}, upsert=False)]]
+        self.check("Increments to one document coalesce into one $inc", writes == expected, f"(writes={writes})")
+
+    async def test_write_through_when_not_running(self):
+        server.db = FakeDatabase()
+        buffer = server.CounterBuffer(flush_interval=60, max_keys=100)
+        await buffer.increment("user_profiles", "wallet_address", "0xA", {"snippets_count": 1}, upsert=True)
+
+        updates = server.db["user_profiles"].updates
+        self.check("Increments are written through when the flusher is not running",
+                   updates == [({"wallet_address": "0xA"}, {"$inc": {"snippets_count": 1}}, True)] and not buffer.pending,
+                   f"(updates={updates})")
+
+    async def test_failed_flush_is_retried(self):
+        buffer = self.fresh_buffer()
+        collection = server.db["user_profiles"]
+        collection.errors.append(ConnectionFailure("primary stepped down"))
+
+        await buffer.increment("user_profiles", "wallet_address", "0xA", {"followers_count": 2})
+        await buffer.flush()
+        self.check("A failed flush keeps its increments",
+                   buffer.pending_delta("user_profiles", "wallet_address", "0xA", "followers_count") == 2
+                   and not collection.bulk_writes)
+
+        await buffer.increment("user_profiles", "wallet_address", "0xA", {"followers_count": 1})
+        await buffer.flush()
+        expected = [[UpdateOne({"wallet_address": "0xA"}, {"$inc": {"followers_count": 3}}, upsert=False)]]
+        self.check("The next flush writes the kept and new increments together",
+                   collection.bulk_writes == expected and not buffer.pending, f"(writes={collection.bulk_writes})")
+
+    async def test_partial_failure_retries_only_failed_writes(self):
+        buffer = self.fresh_buffer()
+        collection = server.db["user_profiles"]
+        collection.errors.append(BulkWriteError({
+            "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+            "nInserted": 0, "nUpserted": 0, "nMatched": 2, "nModified": 2, "nRemoved": 0, "upserted": []
+        }))
+
+        for address in ["0xA", "0xB", "0xC"]:
+            await buffer.increment("user_profiles", "wallet_address", address, {"followers_count": 1})
+        await buffer.flush()
+        pending = [key for _, _, key in buffer.pending]
+        self.check("Only the write that failed stays buffered", pending == ["0xB"], f"(pending={pending})")
+
+    async def test_stop_flushes_remaining(self):
+        buffer = self.fresh_buffer()
+        buffer.task = None
+        buffer.start()
+        await buffer.increment("user_profiles", "wallet_address", "0xA", {"followers_count": 1})
+        await buffer.stop()
+        self.check("Stopping the flusher writes what is still buffered",
+                   len(server.db["user_profiles"].bulk_writes) == 1 and not buffer.pending and not buffer.running)
+
+    async def run_all(self):
+        await self.test_increments_coalesce()
+        await self.test_write_through_when_not_running()
+        await self.test_failed_flush_is_retried()
+        await self.test_partial_failure_retries_only_failed_writes()
+        await self.test_stop_flushes_remaining()
+
+    def run_counter_buffer_tests(self):
+        print("🧪 Starting Counter Buffer Tests")
+
+        asyncio.run(self.run_all())
+
+        print(f"\n📊 Counter Buffer Tests: {self.tests_passed}/{self.tests_run} passed")
+        return self.tests_passed == self.tests_run
+
+
+def main():
+    tester = CounterBufferTests()
+    success = tester.run_counter_buffer_tests()
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
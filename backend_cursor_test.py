@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Keyset cursor tests
+
+Exercises encode_cursor, decode_cursor and keyset_filter: cursors round-trip
+a (timestamp, _id) position exactly, and anything that is not a cursor the
+server issued is rejected with a 400 instead of a 500. Needs no server or
+database.
+
+Usage: python backend_cursor_test.py
+"""
+
+import base64
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import server  # noqa: E402
+
+
+class CursorTests:
+    """Checks the opaque keyset cursors used by the paginated endpoints."""
+
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def check(self, name, condition, detail=""):
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return condition
+
+    def test_round_trip(self):
+        timestamp = datetime(2025, 7, 11, 12, 30, 45, 123456)
+        object_id = ObjectId()
+        cursor = server.encode_cursor(timestamp, object_id)
+        decoded = server.decode_cursor(cursor)
+        self.check("Cursor round-trips timestamp and _id exactly", decoded == (timestamp, object_id),
+                   f"(decoded={decoded})")
+        self.check("Cursor is URL safe", all(c.isalnum() or c in "-_" for c in cursor), f"(cursor={cursor})")
+
+    def test_keyset_filter(self):
+        timestamp = datetime(2025, 7, 11)
+        object_id = ObjectId()
+        query = server.keyset_filter("created_at", server.encode_cursor(timestamp, object_id))
+        expected = {"$or": [
+            {"created_at": {"$lt": timestamp}},
+            {"created_at": timestamp, "_id": {"$lt": object_id}}
+        ]}
+        self.check("Keyset filter selects positions after the cursor", query == expected, f"(query={query})")
+        self.check("No cursor means no filter", server.keyset_filter("created_at", None) == {})
+
+    def test_invalid_cursors(self):
+        def encoded(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        invalid = {
+            "garbage": "not a cursor!",
+            "not json": base64.urlsafe_b64encode(b"hello").decode(),
+            "missing _id": encoded({"t": "2025-07-11T00:00:00"}),
+            "bad timestamp": encoded({"t": "yesterday", "id": str(ObjectId())}),
+            "bad _id": encoded({"t": "2025-07-11T00:00:00", "id": "xyz"}),
+            "not an object": encoded(["2025-07-11T00:00:00", str(ObjectId())]),
+        }
+        for name, cursor in invalid.items():
+            try:
+                server.decode_cursor(cursor)
+                status = None
+            except HTTPException as e:
+                status = e.status_code
+            except Exception as e:
+                status = type(e).__name__
+            self.check(f"Invalid cursor ({name}) is rejected with 400", status == 400, f"(got {status})")
+
+    def run_cursor_tests(self):
+        print("🧪 Starting Cursor Tests")
+
+        self.test_round_trip()
+        self.test_keyset_filter()
+        self.test_invalid_cursors()
+
+        print(f"\n📊 Cursor Tests: {self.tests_passed}/{self.tests_run} passed")
+        return self.tests_passed == self.tests_run
+
+
+def main():
+    tester = CursorTests()
+    success = tester.run_cursor_tests()
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
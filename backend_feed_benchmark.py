@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Public feed assembly benchmark
+
+Compares the old per-item feed assembly (one profile lookup and two
+count_documents calls per snippet) with the batched build_feed_items used by
+/api/feed/public, with the profile cache both cold and warm. Seeds a throwaway
+database on MONGO_URL, reports median latency and Mongo round trips per page,
+then drops the database.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python backend_feed_benchmark.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import server  # noqa: E402
+
+SNIPPETS = 200
+USERS = 25
+LIKES_PER_SNIPPET = 15
+COMMENTS_PER_SNIPPET = 5
+PAGE_SIZES = [10, 20, 50]
+RUNS = 20
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to MongoDB (one per round trip)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def legacy_feed_items(db, snippets):
+    """Feed assembly as it was before batching: three awaited queries per snippet."""
+    feed_items = []
+    for snippet in snippets:
+        user_profile = await db.user_profiles.find_one({"wallet_address": snippet["wallet_address"]})
+        likes_count = await db.snippet_likes.count_documents({"snippet_id": snippet["irys_id"]})
+        comments_count = await db.snippet_comments.count_documents({"snippet_id": snippet["irys_id"]})
+        feed_items.append({
+            "irys_id": snippet["irys_id"],
+            "username": user_profile.get("username") if user_profile else None,
+            "likes_count": likes_count,
+            "comments_count": comments_count
+        })
+    return feed_items
+
+
+async def cold_feed_items(snippets):
+    """Batched assembly with the profile cache emptied first."""
+    server.profile_cache.invalidate()
+    return await server.build_feed_items(snippets)
+
+
+async def seed(db):
+    """Insert users, public snippets, likes and comments."""
+    print(f"🌱 Seeding {SNIPPETS} snippets, {USERS} users...")
+    wallets = [f"0x{uuid.uuid4().hex[:40]}" for _ in range(USERS)]
+    await db.user_profiles.insert_many([
+        server.UserProfile(wallet_address=wallet, username=f"user{i}").dict()
+        for i, wallet in enumerate(wallets)
+    ])
+
+    now = datetime.utcnow()
+    snippets = []
+    likes = []
+    comments = []
+    for i in range(SNIPPETS):
+        irys_id = f"bench_{uuid.uuid4().hex}"
+        snippets.append(server.SnippetMetadata(
+            wallet_address=wallets[i % USERS],
+            irys_id=irys_id,
+            title=f"Snippet {i}",
+            summary="Benchmark snippet",
+            tags=["bench"],
+            network="devnet",
+            likes_count=LIKES_PER_SNIPPET,
+            comments_count=COMMENTS_PER_SNIPPET,
+            timestamp=now - timedelta(seconds=i)
+        ).dict())
+        likes += [
+            {"id": str(uuid.uuid4()), "user_address": wallets[j % USERS], "snippet_id": irys_id, "created_at": now}
+            for j in range(LIKES_PER_SNIPPET)
+        ]
+        comments += [
+            server.Comment(user_address=wallets[j % USERS], snippet_id=irys_id, content="nice").dict()
+            for j in range(COMMENTS_PER_SNIPPET)
+        ]
+    await db.snippet_metadata.insert_many(snippets)
+    await db.snippet_likes.insert_many(likes)
+    await db.snippet_comments.insert_many(comments)
+
+
+async def measure(name, assemble, db, counter, limit):
+    """Median latency and round trips for assembling one feed page."""
+    timings = []
+    round_trips = 0
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        counter.count = 0
+        snippets = await db.snippet_metadata.find({"is_public": True}).sort("timestamp", -1).limit(limit).to_list(limit)
+        await assemble(snippets)
+        timings.append((time.perf_counter() - start) * 1000)
+        round_trips = counter.count
+    median = statistics.median(timings)
+    print(f"   {name:<10} {median:8.2f} ms  {round_trips:4d} round trips")
+    return median
+
+
+async def run_benchmark():
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[counter])
+    db_name = f"feed_benchmark_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    server.db = db
+
+    try:
+        await seed(db)
+        print("\n📊 Feed page assembly (median of %d runs)" % RUNS)
+        for limit in PAGE_SIZES:
+            print(f"\n📄 Page size {limit}")
+            legacy = await measure("legacy", lambda snippets: legacy_feed_items(db, snippets), db, counter, limit)
+            batched = await measure("batched", cold_feed_items, db, counter, limit)
+            cached = await measure("cached", server.build_feed_items, db, counter, limit)
+            print(f"   ⚡ {legacy / batched:.1f}x faster ({legacy / cached:.1f}x with warm profile cache)")
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
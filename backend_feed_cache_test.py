@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Public feed page cache tests
+
+Exercises FeedPageCache directly with an in-process loader: fresh pages are
+served from memory, expired or invalidated pages are served stale while one
+background refresh rebuilds them, and staleness is measured from when a page
+went stale rather than from when it was stored. Needs no server or database.
+
+Usage: python backend_feed_cache_test.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import server  # noqa: E402
+
+
+class CountingLoader:
+    """Page loader that numbers the pages it builds."""
+
+    def __init__(self, delay=0.0, on_load=None):
+        self.calls = 0
+        self.delay = delay
+        self.on_load = on_load
+
+    async def __call__(self):
+        self.calls += 1
+        if self.on_load:
+            self.on_load()
+        await asyncio.sleep(self.delay)
+        return {"feed": [], "has_more": False, "next_cursor": None, "build": self.calls}
+
+
+class FeedCacheTests:
+    """Checks freshness, stale-while-revalidate and the max-stale bound of FeedPageCache."""
+
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def check(self, name, condition, detail=""):
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return condition
+
+    @staticmethod
+    async def settle(cache):
+        """Wait for background refreshes to finish."""
+        if cache.inflight:
+            await asyncio.gather(*cache.inflight.values())
+
+    async def test_fresh_page_served_from_memory(self):
+        cache = server.FeedPageCache(pages=3, ttl_seconds=60, max_stale_seconds=30)
+        loader = CountingLoader()
+        first = await cache.get(None, 20, loader)
+        second = await cache.get(None, 20, loader)
+        self.check("Fresh page is loaded once", loader.calls == 1 and first is second,
+                   f"(loader calls={loader.calls})")
+
+    async def test_expired_page_served_stale(self):
+        cache = server.FeedPageCache(pages=3, ttl_seconds=0.05, max_stale_seconds=30)
+        loader = CountingLoader(delay=0.05)
+        await cache.get(None, 20, loader)
+        await asyncio.sleep(0.06)
+
+        pages = await asyncio.gather(*(cache.get(None, 20, loader) for _ in range(5)))
+        self.check("Expired page is served stale without waiting",
+                   all(page["build"] == 1 for page in pages), f"(builds={[page['build'] for page in pages]})")
+        await self.settle(cache)
+        self.check("Concurrent stale readers share one refresh", loader.calls == 2,
+                   f"(loader calls={loader.calls})")
+        page = await cache.get(None, 20, loader)
+        self.check("Refreshed page replaces the stale one", page["build"] == 2, f"(build={page['build']})")
+
+    async def test_invalidated_page_served_stale(self):
+        cache = server.FeedPageCache(pages=3, ttl_seconds=60, max_stale_seconds=30)
+        loader = CountingLoader()
+        await cache.get(None, 20, loader)
+        cache.invalidate()
+
+        page = await cache.get(None, 20, loader)
+        await self.settle(cache)
+        self.check("Invalidated page is served stale while refreshing",
+                   page["build"] == 1 and loader.calls == 2, f"(build={page['build']}, loader calls={loader.calls})")
+
+    async def test_staleness_counts_from_invalidation(self):
+        cache = server.FeedPageCache(pages=3, ttl_seconds=60, max_stale_seconds=0.1)
+        loader = CountingLoader()
+        await cache.get(None, 20, loader)
+        await asyncio.sleep(0.15)  # Older than max_stale, but still fresh
+
+        cache.invalidate()
+        page = await cache.get(None, 20, loader)
+        await self.settle(cache)
+        self.check("A page stored long ago but just invalidated is still served stale",
+                   page["build"] == 1, f"(build={page['build']})")
+
+        cache.invalidate()
+        await asyncio.sleep(0.15)
+        page = await cache.get(None, 20, loader)
+        self.check("A page stale for longer than max_stale is rebuilt inline",
+                   page["build"] == loader.calls, f"(build={page['build']}, loader calls={loader.calls})")
+
+    async def test_invalidated_while_loading(self):
+        cache = server.FeedPageCache(pages=3, ttl_seconds=60, max_stale_seconds=30)
+        loader = CountingLoader(on_load=lambda: cache.invalidate() if loader.calls == 1 else None)
+        await cache.get(None, 20, loader)
+
+        await cache.get(None, 20, loader)
+        await self.settle(cache)
+        self.check("A write during the load triggers another refresh", loader.calls == 2,
+                   f"(loader calls={loader.calls})")
+
+    async def run_all(self):
+        await self.test_fresh_page_served_from_memory()
+        await self.test_expired_page_served_stale()
+        await self.test_invalidated_page_served_stale()
+        await self.test_staleness_counts_from_invalidation()
+        await self.test_invalidated_while_loading()
+
+    def run_feed_cache_tests(self):
+        print("🧪 Starting Feed Cache Tests")
+
+        asyncio.run(self.run_all())
+
+        print(f"\n📊 Feed Cache Tests: {self.tests_passed}/{self.tests_run} passed")
+        return self.tests_passed == self.tests_run
+
+
+def main():
+    tester = FeedCacheTests()
+    success = tester.run_feed_cache_tests()
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import requests
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+class LikeConcurrencyTests:
+    """Hammers /api/social/like with concurrent toggles and checks the counters stay exact."""
+
+    def __init__(self, base_url=None):
+        if base_url is None:
+            base_url = "https://d00b4657-68ce-4888-8abc-6ba2789e24e5.preview.emergentagent.com"
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.author_address = f"0x{uuid.uuid4().hex[:40]}"
+
+    def check(self, name, condition, detail=""):
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return condition
+
+    def create_snippet(self):
+        irys_id = f"like-race-{uuid.uuid4()}"
+        response = requests.post(f"{self.api_url}/save-snippet-metadata", json={
+            "wallet_address": self.author_address,
+            "irys_id": irys_id,
+            "title": "Like concurrency test",
+            "summary": "Snippet used to race like toggles",
+            "tags": ["test"],
+            "network": "devnet"
+        })
+        response.raise_for_status()
+        return irys_id
+
+    def toggle(self, user_address, snippet_id):
+        response = requests.post(f"{self.api_url}/social/like", json={
+            "user_address": user_address,
+            "snippet_id": snippet_id
+        })
+        return response.status_code, response.json() if response.ok else response.text
+
+    def detail(self, snippet_id, viewer):
+        response = requests.get(f"{self.api_url}/snippets/detail/{snippet_id}", params={"viewer": viewer})
+        response.raise_for_status()
+        return response.json()["snippet"]
+
+    def test_same_user_double_clicks(self, clicks=20):
+        """One user toggling many times at once must end liked iff the click count is odd."""
+        snippet_id = self.create_snippet()
+        user_address = f"0x{uuid.uuid4().hex[:40]}"
+        with ThreadPoolExecutor(max_workers=clicks) as pool:
+            results = list(pool.map(lambda _: self.toggle(user_address, snippet_id), range(clicks)))
+
+        errors = [result for status, result in results if status != 200]
+        likes = sum(1 for status, result in results if status == 200 and result["liked"])
+        snippet = self.detail(snippet_id, user_address)
+
+        self.check("No errors on concurrent toggles", not errors, f"({len(errors)} errors)")
+        self.check("Toggles alternate", likes == (clicks + 1) // 2, f"({likes} likes out of {clicks} toggles)")
+        expected = clicks % 2
+        self.check("Counter matches like state", snippet["likes_count"] == expected and snippet["is_liked"] == bool(expected),
+                   f"(likes_count={snippet['likes_count']}, is_liked={snippet['is_liked']})")
+
+    def test_many_users_at_once(self, users=30):
+        """Many users liking at once must each be counted exactly once."""
+        snippet_id = self.create_snippet()
+        addresses = [f"0x{uuid.uuid4().hex[:40]}" for _ in range(users)]
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            results = list(pool.map(lambda address: self.toggle(address, snippet_id), addresses))
+
+        self.check("All likes accepted", all(status == 200 and result["liked"] for status, result in results))
+        snippet = self.detail(snippet_id, addresses[0])
+        self.check("Counter equals number of users", snippet["likes_count"] == users,
+                   f"(likes_count={snippet['likes_count']}, expected {users})")
+
+    def run_concurrency_tests(self):
+        print("🧪 Starting Like Concurrency Tests")
+
+        self.test_same_user_double_clicks()
+        self.test_many_users_at_once()
+
+        print(f"\n📊 Like Concurrency Tests: {self.tests_passed}/{self.tests_run} passed")
+        return self.tests_passed == self.tests_run
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else None
+    tester = LikeConcurrencyTests(base_url)
+    success = tester.run_concurrency_tests()
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,32 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { ethers } from 'ethers';
 import './App.css';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Payloads larger than this are uploaded gzip compressed
+const COMPRESS_PAYLOAD_THRESHOLD = 4096;
+
+// Subscribe to the server's live update stream while `enabled`.
+// `handlers` maps event names (e.g. 'snippet.likes') to callbacks taking the parsed payload.
+const useLiveEvents = (handlers, enabled = true) => {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === 'undefined') return undefined;
+    const source = new EventSource(`${API}/events`);
+    Object.keys(handlersRef.current).forEach(name => {
+      source.addEventListener(name, (event) => {
+        const handler = handlersRef.current[name];
+        if (handler) handler(JSON.parse(event.data));
+      });
+    });
+    return () => source.close();
+  }, [enabled]);
+};
+
 // Glass Card Component
 const GlassCard = ({ children, className = "", ...props }) => (
   <div className={`glass-card ${className}`} {...props}>
@@ -37,6 +59,8 @@ const CommentSystem = ({ snippetId, userAddress, isOpen, onClose }) => {
   const [newComment, setNewComment] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     if (isOpen && snippetId) {
@@ -44,13 +68,27 @@ const CommentSystem = ({ snippetId, userAddress, isOpen, onClose }) => {
     }
   }, [isOpen, snippetId]);
 
+  // Insert or replace a comment by id (the live event carries the username)
+  const upsertComment = (comment) => {
+    setComments(current => [comment, ...current.filter(existing => existing.id !== comment.id)]);
+  };
+
+  useLiveEvents({
+    'comment.created': ({ comment }) => {
+      if (comment.snippet_id === snippetId) upsertComment(comment);
+    }
+  }, isOpen && !!snippetId);
+
   const fetchComments = async () => {
     try {
       setIsLoading(true);
-      const response = await fetch(`${API}/social/comments/${snippetId}`);
+      // The detail endpoint returns the first comment page with usernames in one round trip
+      const params = userAddress ? `?viewer=${encodeURIComponent(userAddress)}` : '';
+      const response = await fetch(`${API}/snippets/detail/${snippetId}${params}`);
       if (!response.ok) throw new Error('Failed to fetch comments');
       const data = await response.json();
       setComments(data.comments || []);
+      setNextCursor(data.comments_next_cursor || null);
     } catch (error) {
       console.error('Error fetching comments:', error);
     } finally {
@@ -58,6 +96,25 @@ const CommentSystem = ({ snippetId, userAddress, isOpen, onClose }) => {
     }
   };
 
+  const loadMoreComments = async () => {
+    if (!nextCursor) return;
+    try {
+      setIsLoadingMore(true);
+      const response = await fetch(`${API}/social/comments/${snippetId}?cursor=${encodeURIComponent(nextCursor)}`);
+      if (!response.ok) throw new Error('Failed to fetch comments');
+      const data = await response.json();
+      setComments(current => [
+        ...current,
+        ...(data.comments || []).filter(comment => !current.some(existing => existing.id === comment.id))
+      ]);
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching more comments:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleSubmitComment = async (e) => {
     e.preventDefault();
     if (!newComment.trim() || !userAddress) return;
@@ -76,7 +133,10 @@ const CommentSystem = ({ snippetId, userAddress, isOpen, onClose }) => {
 
       if (response.ok) {
         setNewComment('');
-        fetchComments(); // Refresh comments
+        const comment = await response.json();
+        setComments(current => current.some(existing => existing.id === comment.id)
+          ? current
+          : [comment, ...current]);
       }
     } catch (error) {
       console.error('Error submitting comment:', error);
@@ -120,6 +180,11 @@ const CommentSystem = ({ snippetId, userAddress, isOpen, onClose }) => {
                   </div>
                 ))
               )}
+              {nextCursor && (
+                <NeonButton onClick={loadMoreComments} disabled={isLoadingMore} variant="secondary" className="load-more-comments">
+                  {isLoadingMore ? <LoadingSpinner size="sm" /> : 'Load more comments'}
+                </NeonButton>
+              )}
             </div>
           )}
 
@@ -185,13 +250,43 @@ const PublicFeed = ({ userAddress }) => {
 
   useEffect(() => {
     fetchPublicFeed();
-  }, []);
+  }, [userAddress]);
+
+  // Apply pushed updates instead of re-fetching the feed
+  const updateSnippet = (irysId, changes) => {
+    setFeed(currentFeed => currentFeed.map(snippet =>
+      snippet.irys_id === irysId ? { ...snippet, ...changes } : snippet
+    ));
+  };
+
+  const adjustCount = (irysId, field, delta) => {
+    setFeed(currentFeed => currentFeed.map(snippet =>
+      snippet.irys_id === irysId ? { ...snippet, [field]: Math.max(0, (snippet[field] || 0) + delta) } : snippet
+    ));
+  };
+
+  useLiveEvents({
+    'snippet.created': (snippet) => {
+      setFeed(currentFeed => currentFeed.some(existing => existing.id === snippet.id)
+        ? currentFeed
+        : [snippet, ...currentFeed]);
+    },
+    'snippet.resolved': ({ snippet_id, irys_id }) => updateSnippet(snippet_id, { irys_id }),
+    // Counts arrive as deltas; this user's own likes were already applied by handleLike
+    'snippet.likes': ({ snippet_id, user_address, delta }) => {
+      if (user_address !== userAddress) adjustCount(snippet_id, 'likes_count', delta);
+    },
+    'comment.created': ({ comment, comments_delta }) => {
+      adjustCount(comment.snippet_id, 'comments_count', comments_delta);
+    }
+  });
 
   const fetchPublicFeed = async () => {
     try {
       setIsLoading(true);
       setError(null);
-      const response = await fetch(`${API}/feed/public`);
+      const params = userAddress ? `?viewer=${encodeURIComponent(userAddress)}` : '';
+      const response = await fetch(`${API}/feed/public${params}`);
       if (!response.ok) throw new Error('Failed to fetch feed');
       const data = await response.json();
       setFeed(data.feed || []);
@@ -217,8 +312,10 @@ const PublicFeed = ({ userAddress }) => {
       });
       
       if (response.ok) {
-        // Refresh feed to update like status
-        fetchPublicFeed();
+        // Apply the toggle locally instead of re-fetching the whole feed
+        const { liked } = await response.json();
+        updateSnippet(snippetId, { is_liked: liked });
+        adjustCount(snippetId, 'likes_count', liked ? 1 : -1);
       }
     } catch (error) {
       console.error('Error liking snippet:', error);
@@ -233,8 +330,6 @@ const PublicFeed = ({ userAddress }) => {
   const handleCloseComments = () => {
     setCommentModalOpen(false);
     setSelectedSnippetId(null);
-    // Refresh feed to update comment count
-    fetchPublicFeed();
   };
 
   if (isLoading) {
@@ -596,7 +691,8 @@ const createIrysUploader = async (signer) => {
             data,
             signature,
             address,
-            tags: options.tags || []
+            tags: options.tags || [],
+            encoding: options.encoding
           })
         });
         
@@ -888,8 +984,10 @@ const SnippetForm = ({ signer, userAddress, onSnippetSaved }) => {
         network: network
       };
       
-      // Upload to REAL Irys blockchain via our backend
-      const receipt = await irysUploader.upload(JSON.stringify(blockchainData), {
+      // Upload to REAL Irys blockchain via our backend (long snippets and images go gzip compressed)
+      const payload = JSON.stringify(blockchainData);
+      const receipt = await irysUploader.upload(payload, {
+        encoding: payload.length > COMPRESS_PAYLOAD_THRESHOLD ? 'gzip' : undefined,
         tags: [
           { name: "application-id", value: "IrysSnippetVault" },
           { name: "user", value: userAddress },
@@ -928,7 +1026,12 @@ const SnippetForm = ({ signer, userAddress, onSnippetSaved }) => {
         : `https://gateway.irys.xyz/${receipt.id}`;
       
       const contentTypeLabel = contentTypes.find(ct => ct.id === contentType)?.label || contentType;
-      alert(`🎉 SUCCESS! ${contentTypeLabel} saved to Irys blockchain!\n\nTransaction ID: ${receipt.id}\n\nView permanently stored data:\n${gatewayUrl}\n\nThis is now stored FOREVER on the blockchain!`);
+      if (receipt.status && receipt.status !== 'done') {
+        // Upload was queued; the backend swaps in the real transaction id once it lands
+        alert(`⏳ ${contentTypeLabel} queued for the Irys blockchain!\n\nUpload ID: ${receipt.id}\n\nIt will appear in your vault as soon as the upload is confirmed.`);
+      } else {
+        alert(`🎉 SUCCESS! ${contentTypeLabel} saved to Irys blockchain!\n\nTransaction ID: ${receipt.id}\n\nView permanently stored data:\n${gatewayUrl}\n\nThis is now stored FOREVER on the blockchain!`);
+      }
       
       resetForm();
       if (onSnippetSaved) onSnippetSaved();
@@ -1187,6 +1290,8 @@ const SnippetForm = ({ signer, userAddress, onSnippetSaved }) => {
 const SnippetList = ({ userAddress, refreshTrigger }) => {
   const [snippets, setSnippets] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   const fetchSnippets = async () => {
     if (!userAddress) return;
@@ -1197,14 +1302,37 @@ const SnippetList = ({ userAddress, refreshTrigger }) => {
       const response = await fetch(`${API}/irys-query/${userAddress}`);
       const data = await response.json();
       setSnippets(data.snippets || []);
+      setNextCursor(data.has_more ? data.next_cursor : null);
     } catch (error) {
       console.error('Error fetching snippets from blockchain:', error);
       setSnippets([]);
+      setNextCursor(null);
     } finally {
       setIsLoading(false);
     }
   };
 
+  // The vault is paginated; follow next_cursor for older snippets
+  const loadMoreSnippets = async () => {
+    if (!nextCursor) return;
+    
+    try {
+      setIsLoadingMore(true);
+      const response = await fetch(`${API}/irys-query/${userAddress}?cursor=${encodeURIComponent(nextCursor)}`);
+      if (!response.ok) throw new Error('Failed to fetch snippets');
+      const data = await response.json();
+      setSnippets(current => [
+        ...current,
+        ...(data.snippets || []).filter(snippet => !current.some(existing => existing.id === snippet.id))
+      ]);
+      setNextCursor(data.has_more ? data.next_cursor : null);
+    } catch (error) {
+      console.error('Error fetching more snippets from blockchain:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchSnippets();
   }, [userAddress, refreshTrigger]);
@@ -1273,6 +1401,12 @@ const SnippetList = ({ userAddress, refreshTrigger }) => {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <NeonButton onClick={loadMoreSnippets} disabled={isLoadingMore} variant="secondary" className="load-more-snippets">
+          {isLoadingMore ? <LoadingSpinner size="sm" /> : 'Load more snippets'}
+        </NeonButton>
+      )}
     </GlassCard>
   );
 };
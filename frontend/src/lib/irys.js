@@ -44,6 +44,22 @@ export async function uploadSnippet(data) {
   return receipt.id;
 }
 
+// Snippet payloads may be gzip compressed (tagged with Content-Encoding)
+const GZIP_MAGIC = [0x1f, 0x8b];
+
+const hasMagic = (bytes, magic) => magic.every((byte, i) => bytes[i] === byte);
+
+export async function readSnippetPayload(response) {
+  const bytes = new Uint8Array(await response.arrayBuffer());
+  
+  // The gateway may already have decoded the body; only sniff what is still compressed
+  if (hasMagic(bytes, GZIP_MAGIC)) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return JSON.parse(await new Response(stream).text());
+  }
+  return JSON.parse(new TextDecoder().decode(bytes));
+}
+
 export async function listSnippets(wallet) {
   try {
     const myQuery = new Query();
@@ -59,7 +75,7 @@ export async function listSnippets(wallet) {
     
     const snippets = await Promise.all(results.map(async tx => {
       try {
-        const data = await fetch(`https://gateway.irys.xyz/${tx.id}`).then(r => r.json());
+        const data = await fetch(`https://gateway.irys.xyz/${tx.id}`).then(readSnippetPayload);
         return { 
           id: tx.id, 
           irys_id: tx.id,